@@ -1,16 +1,33 @@
 import asyncio
+import atexit
+import concurrent.futures
+import contextvars
 import random
 import logging
+import math
 import os
+import queue
+import re
+import threading
+import time
+import weakref
 import tempfile
+import io
 import json
-from datetime import datetime
-from flask import Flask, jsonify, request, send_file
+import unicodedata
+from datetime import datetime, timedelta
+from urllib.parse import quote, quote_plus
+import aiohttp
+import orjson
+from flask import Flask, Response, jsonify, request, send_file, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import NotFound
 from flask_cors import CORS
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+from cachetools import TTLCache
 from playwright.async_api import async_playwright
 import csv
-from openpyxl import Workbook
+import zipfile
 
 # ---------------- Logging setup ----------------
 logging.basicConfig(
@@ -20,14 +37,28 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # ---------------- User-Agent pool ----------------
-USER_AGENTS = [
+USER_AGENTS = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
     "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:123.0) "
     "Gecko/20100101 Firefox/123.0",
-]
+)
+
+# Private generator for UA/viewport rotation, independent of the global random state
+fingerprint_rng = random.Random()
+
+# Delay/scroll jitter generator, one per asyncio task (each task runs in its own context copy)
+_task_rng = contextvars.ContextVar("task_rng", default=None)
+
+
+def task_rng():
+    rng = _task_rng.get()
+    if rng is None:
+        rng = random.Random()
+        _task_rng.set(rng)
+    return rng
 
 # ---------------- Authentication configuration ----------------
 AUTO_AUTH_CONFIG = {
@@ -44,1212 +75,2211 @@ AUTO_AUTH_CONFIG = {
 DEFAULT_TIMEOUT = 60000  # 60 seconds for most operations
 NAVIGATION_TIMEOUT = 60000  # 60 seconds for navigation
 SELECTOR_TIMEOUT = 15000  # 15 seconds for waiting for selectors
+REVIEW_WAIT_TIMEOUT = 10000  # 10 seconds for reviews to render before extracting anyway
+REVIEW_PAGE_CONCURRENCY = 4  # review pages of one product loaded side by side
+SERP_WAIT_TIMEOUT = 10000  # 10 seconds for search results; the SERP is server-rendered
+REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "120"))  # seconds a route waits on the background loop
+
+# ---------------- Scraping behaviour ----------------
+# Human-like delays and scrolling on the scraping paths (search, details, reviews). Off by default
+# for throughput on batch runs; set SCRAPE_STEALTH=1 when scraping live traffic from one IP.
+# The sign-in flow keeps its pacing either way.
+SCRAPE_STEALTH = os.getenv("SCRAPE_STEALTH", "0") == "1"
+# Upper bound on product pages scraped at once, across all requests
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+# Try product pages over plain HTTP before rendering them; set HTTP_FAST_PATH=0 to always use the browser
+HTTP_FAST_PATH = os.getenv("HTTP_FAST_PATH", "1") == "1"
+# Excel exports are built on download; set EXPORTS_TO_DISK=1 to also keep a copy in exports/
+EXPORTS_TO_DISK = os.getenv("EXPORTS_TO_DISK", "0") == "1"
+
+# ---------------- Amazon URLs ----------------
+AMAZON_BASE = "https://www.amazon.com"
+SEARCH_URL_TMPL = AMAZON_BASE + "/s?k={}"
+
+# ---------------- Paths ----------------
+# index.html, script.js and styles.css live in the repository root
+FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Browsers may reuse frontend assets for this long before revalidating
+STATIC_MAX_AGE = 3600
+# Excel/CSV exports written to disk
+EXPORTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'exports'))
+# Recent exports rendered for download when EXPORTS_TO_DISK is off; kept only while their cache entry lives
+EXPORTS_TMP_DIR = os.path.join(tempfile.gettempdir(), 'amazon_scraper_exports')
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# ---------------- Extraction patterns ----------------
+RATING_RE = re.compile(r"(\d+\.?\d*)")  # "4.5 out of 5 stars" -> 4.5
+REVIEW_COUNT_RE = re.compile(r"([\d,]+)")  # "1,234 ratings" -> 1,234
+PRODUCT_URL_RE = re.compile(r"(/dp/[A-Z0-9]{10}).*")  # drop slug suffix, ref tags and query
+ASIN_RE = re.compile(r"/dp/([A-Z0-9]+)")  # ".../dp/B08N5WRWNW/..." -> B08N5WRWNW
+
+# ---------------- Product page selectors (tried in order) ----------------
+PRODUCT_TITLE_SELECTORS = [
+    "#productTitle",
+    "#title",
+    ".a-size-large.product-title-word-break",
+    "h1.a-size-large"
+]
+PRODUCT_PRICE_SELECTORS = [
+    ".a-price .a-offscreen",
+    "#priceblock_ourprice",
+    "#priceblock_dealprice",
+    "#priceblock_saleprice",
+    ".a-price-whole",
+    ".a-color-price",
+    "#corePrice_feature_div .a-price .a-offscreen",
+    "#corePriceDisplay_desktop_feature_div .a-price-whole",
+    "#corePriceDisplay_desktop_feature_div .a-price-fraction",
+    ".a-price .a-offscreen:first-child",
+    "#snsPrice .a-price .a-offscreen",
+    ".apexPriceToPay .a-offscreen"
+]
+PRODUCT_RATING_SELECTORS = [
+    ".a-icon-star-small .a-icon-alt",
+    ".a-icon-star .a-icon-alt",
+    "#acrPopover .a-icon-alt",
+    ".review-rating",
+    "#averageCustomerReviews .a-icon-alt",
+    ".a-declarative[data-action='acrStarsLink'] .a-icon-alt",
+    "#acrPopover [data-cy='reviews-ratings-date']"
+]
+PRODUCT_REVIEW_COUNT_SELECTORS = [
+    "#acrCustomerReviewText",
+    ".a-size-base",
+    "a[href*='customerReviews']",
+    "#acrCustomerReviewLink",
+    "[data-cy='reviews-ratings-count']",
+    ".a-link-emphasis"
+]
 
-def create_app() -> Flask:
-    app = Flask(__name__)
+# For each field, the trimmed text of every selector's first match (null if none)
+FIRST_MATCH_TEXTS_JS = """
+(fields) => fields.map((selectors) => selectors.map((selector) => {
+    const el = document.querySelector(selector);
+    return el ? el.textContent.trim() : null;
+}))
+"""
+
+# ---------------- Search result selectors (tried in order) ----------------
+SERP_CONTAINER_SELECTORS = [
+    '[data-component-type="s-search-result"]',
+    '[data-asin][data-index]',
+    '.s-result-item'
+]
+SERP_TITLE_SELECTORS = [
+    'h2 a span',
+    'h2 span',
+    '.a-text-normal',
+    'span.a-text-normal'
+]
+SERP_LINK_SELECTORS = [
+    'h2 a',
+    'a.a-link-normal',
+    'a[href*="/dp/"]'
+]
+# Current markup, read in the page; the other container selectors are for the HTML fallback
+SERP_RESULT_SELECTOR = SERP_CONTAINER_SELECTORS[0]
+
+# Title text and href of the first `limit` results in one round trip, null when missing
+SERP_RESULTS_JS = """
+([containerSelector, titleSelectors, linkSelectors, limit]) => {
+    const first = (node, selectors) => {
+        for (const selector of selectors) {
+            const el = node.querySelector(selector);
+            if (el) return el;
+        }
+        return null;
+    };
+    return Array.from(document.querySelectorAll(containerSelector)).slice(0, limit).map((container) => {
+        const title = first(container, titleSelectors);
+        const link = first(container, linkSelectors);
+        return title && link ? [title.textContent.trim(), link.getAttribute("href")] : null;
+    });
+}
+"""
+
+# ---------------- Review page extraction ----------------
+# Review fields, selectors tried in order within each review
+REVIEW_CONTAINER_SELECTORS = [
+    'li[data-hook="review"]',
+    '.review',
+    '[data-hook="review"]',
+    '.a-section.review'
+]
+REVIEW_TEXT_SELECTORS = [
+    '[data-hook="review-body"]',
+    '.review-text-content',
+    '.a-expander-content',
+    '[data-hook="review-collapsed"]'
+]
+REVIEW_RATING_SELECTORS = [
+    '[data-hook="review-star-rating"] .a-icon-alt',
+    '.a-icon-star .a-icon-alt',
+    '[data-hook="cmps-review-star-rating"]'
+]
+REVIEW_NAME_SELECTORS = [
+    '[data-hook="review-author"]',
+    '.a-profile-name',
+    '[data-hook="cmps-reviewer-name"]'
+]
+REVIEW_DATE_SELECTORS = [
+    '[data-hook="review-date"]',
+    '.review-date',
+    '[data-hook="cmps-review-date"]'
+]
+REVIEW_HELPFUL_SELECTORS = [
+    '[data-hook="helpful-vote-statement"]',
+    '.helpful-votes',
+    '[data-hook="cmps-helpful-vote-statement"]'
+]
+REVIEW_FIELD_SELECTORS = [
+    REVIEW_TEXT_SELECTORS, REVIEW_RATING_SELECTORS, REVIEW_NAME_SELECTORS,
+    REVIEW_DATE_SELECTORS, REVIEW_HELPFUL_SELECTORS
+]
+HOOK_SELECTOR_RE = re.compile(r'\[data-hook="([^"]+)"\]')
 
-    # ---------------- Helper: Generate Excel file from review data ----------------
-    def generate_excel_file(search_term, products):
-        """Generate Excel file with review data organized by product"""
-
-        # Create a new workbook and select the active worksheet
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Amazon Reviews"
-
-        # Define headers
-        headers = ['Product', 'Reviewer Name', 'Rating', 'Date', 'Review Text', 'Helpful Votes']
-        for col_num, header in enumerate(headers, 1):
-            ws.cell(row=1, column=col_num, value=header)
-
-        # Start from row 2
-        row_num = 2
-
-        # Add summary information
-        ws.cell(row=row_num, column=1, value='SUMMARY')
-        ws.cell(row=row_num, column=2, value=f'Search Term: {search_term}')
-        ws.cell(row=row_num, column=4, value=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        row_num += 1
-
-        # Process each product
-        for i, product in enumerate(products, 1):
-            # Add product header
-            product_title = product["title"][:50] + "..." if len(product["title"]) > 50 else product["title"]
-            ws.cell(row=row_num, column=1, value=f'PRODUCT {i}: {product_title}')
-            ws.cell(row=row_num, column=2, value=product["url"])
-            ws.cell(row=row_num, column=3, value=f'Reviews: {product["reviews_count"]}')
-            ws.cell(row=row_num, column=4, value='Success: Yes' if product["success"] else 'Success: No')
-            row_num += 1
-
-            # Add reviews for this product
-            reviews = product.get("reviews", [])
-            for review in reviews:
-                ws.cell(row=row_num, column=1, value=product_title)
-                ws.cell(row=row_num, column=2, value=review.get("reviewer_name", ""))
-                ws.cell(row=row_num, column=3, value=review.get("rating", ""))
-                ws.cell(row=row_num, column=4, value=review.get("date", ""))
-                ws.cell(row=row_num, column=5, value=review.get("text", ""))
-                ws.cell(row=row_num, column=6, value=review.get("helpful_votes", ""))
-                row_num += 1
-
-        # Save to exports directory
-        exports_dir = os.path.join(os.path.dirname(__file__), '..', 'exports')
-        os.makedirs(exports_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"amazon_reviews_{search_term.replace(' ', '_')}_{timestamp}.xlsx"
-        filepath = os.path.join(exports_dir, filename)
-
-        # Save the workbook
-        wb.save(filepath)
-
-        return filepath, filename
-
-    # ---------------- Helper: Load/Save authentication config ----------------
-    def load_auth_config():
-        """Load authentication configuration from file"""
-        config_file = os.path.join(os.path.dirname(__file__), 'auth_config.json')
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r') as f:
-                    config = json.load(f)
-                    # Merge with default config
-                    merged_config = AUTO_AUTH_CONFIG.copy()
-                    merged_config.update(config)
-                    return merged_config
-            except Exception as e:
-                logger.warning(f"⚠️ Error loading auth config: {str(e)}")
-        return AUTO_AUTH_CONFIG.copy()
 
-    def save_auth_config(config):
-        """Save authentication configuration to file"""
-        config_file = os.path.join(os.path.dirname(__file__), 'auth_config.json')
+def review_field_plan(fields):
+    """Union selector plus per-selector routing for REVIEW_FIELD_TEXTS_JS
+
+    Plain [data-hook="..."] selectors are indexed by hook value, so a hit is
+    bucketed with one attribute read; only the rest need el.matches().
+    """
+    by_hook = {}
+    others = []
+    for f, selectors in enumerate(fields):
+        for s, selector in enumerate(selectors):
+            if hook := HOOK_SELECTOR_RE.fullmatch(selector):
+                by_hook.setdefault(hook.group(1), []).append([f, s])
+            else:
+                others.append([f, s, selector])
+    return {
+        "union": ", ".join(selector for selectors in fields for selector in selectors),
+        "byHook": by_hook,
+        "others": others,
+        "sizes": [len(selectors) for selectors in fields],
+    }
+
+
+# Built once at import rather than re-derived in the page on every evaluate
+REVIEW_FIELD_PLAN = review_field_plan(REVIEW_FIELD_SELECTORS)
+
+# Any review container; used to wait until reviews are in the DOM
+REVIEW_READY_SELECTOR = '[data-hook="review"], .review, .a-section.review'
+
+# With the first container selector that matches, each review's id and FIRST_MATCH_TEXTS_JS-style field texts.
+# One union query per review walks its subtree once; hits arrive in document order, so the first
+# hit matching a selector is exactly what querySelector(selector) would have returned.
+REVIEW_FIELD_TEXTS_JS = """
+([containerSelectors, plan, limit]) => {
+    const byHook = new Map(Object.entries(plan.byHook));
+    const others = plan.others;
+    const readReview = (review) => {
+        const texts = plan.sizes.map((size) => Array(size).fill(null));
+        for (const el of review.querySelectorAll(plan.union)) {
+            let text;
+            const fill = (f, s) => {
+                if (texts[f][s] === null) {
+                    texts[f][s] = text ??= el.textContent.trim();
+                }
+            };
+            for (const [f, s] of byHook.get(el.getAttribute("data-hook")) ?? []) {
+                fill(f, s);
+            }
+            for (const [f, s, selector] of others) {
+                if (texts[f][s] === null && el.matches(selector)) {
+                    fill(f, s);
+                }
+            }
+        }
+        return texts;
+    };
+    for (const containerSelector of containerSelectors) {
+        const reviews = [...document.querySelectorAll(containerSelector)];
+        if (reviews.length) {
+            return {selector: containerSelector, reviews: reviews.slice(0, limit ?? undefined).map((review) => [review.id || null, readReview(review)])};
+        }
+    }
+    return {selector: null, reviews: []};
+}
+"""
+
+# ---------------- Response caches ----------------
+DETAILS_CACHE = TTLCache(maxsize=4096, ttl=900)  # canonical product URL -> details
+REVIEWS_CACHE = TTLCache(maxsize=256, ttl=900)  # (canonical product URL, max reviews, max pages) -> reviews
+SEARCH_CACHE = TTLCache(maxsize=1024, ttl=600)  # (route, lowercased keyword, limit, ...) -> results
+EXPORTS_CACHE = TTLCache(maxsize=32, ttl=1800)  # export basename -> (search term, products, generated at)
+_cache_lock = threading.Lock()
+
+
+def canonical_product_url(url):
+    """Reduce a product URL to its /dp/<ASIN> form so variants share a cache entry"""
+    return PRODUCT_URL_RE.sub(r"\1", url)
+
+
+def cache_get(cache, key):
+    with _cache_lock:
+        return cache.get(key)
+
+
+def cache_set(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+
+
+# One asyncio.Lock per in-flight key; entries vanish once no coroutine holds them
+_key_locks = weakref.WeakValueDictionary()
+
+
+async def memoized(cache, key, fetch, cacheable=lambda result: result.get("success")):
+    """Return the cached result for key, or run fetch() once for all concurrent callers
+
+    Only results passing cacheable() (by default, successful ones) are cached,
+    so failures are retried next time.
+    """
+    cached = cache_get(cache, key)
+    if cached is not None:
+        logger.info(f"⚡ Serving cached result for: {key}")
+        return cached
+
+    lock = _key_locks.get((id(cache), key))
+    if lock is None:
+        lock = _key_locks[(id(cache), key)] = asyncio.Lock()
+    async with lock:
+        # Someone else may have filled it while we waited
+        cached = cache_get(cache, key)
+        if cached is not None:
+            return cached
+        result = await fetch()
+        if cacheable(result):
+            cache_set(cache, key, result)
+        return result
+
+
+# ---------------- Browser configuration ----------------
+BROWSER_HEADLESS = True
+# Launch Chromium when the app starts instead of on the first scrape; set BROWSER_WARMUP=0 to disable
+BROWSER_WARMUP = os.getenv("BROWSER_WARMUP", "1") == "1"
+BROWSER_LAUNCH_ARGS = (
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-web-security",
+    "--disable-extensions",
+    "--disable-plugins",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=VizDisplayCompositor",
+    "--disable-ipc-flooding-protection",
+    "--disable-hang-monitor",
+    "--disable-prompt-on-repost",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-logging",
+    "--disable-permissions-api",
+    "--disable-notifications",
+    "--disable-geolocation",
+    "--disable-speech-api",
+    "--disable-file-system",
+    "--disable-presentation-api",
+    "--disable-remote-fonts",
+    "--disable-client-side-phishing-detection",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-default-apps",
+    "--disable-domain-reliability",
+    "--disable-features=TranslateUI",
+    "--hide-scrollbars",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--no-pings",
+    "--no-zygote",
+    "--use-mock-keychain",
+)
+# Hide the automation tells Amazon's bot checks look for
+STEALTH_JS = """
+// Remove webdriver property
+Object.defineProperty(navigator, 'webdriver', {
+    get: () => undefined,
+});
+
+// Override the plugins property to use a custom getter
+Object.defineProperty(navigator, 'plugins', {
+    get: () => [1, 2, 3, 4, 5],
+});
+
+// Override the languages property to use a custom getter
+Object.defineProperty(navigator, 'languages', {
+    get: () => ['en-US', 'en'],
+});
+
+// Override the permissions property to use a custom getter
+const originalQuery = window.navigator.permissions.query;
+window.navigator.permissions.query = (parameters) => (
+    parameters.name === 'notifications' ?
+        Promise.resolve({ state: Notification.permission }) :
+        originalQuery(parameters)
+);
+
+// Mock chrome object
+window.chrome = {
+    runtime: {},
+    loadTimes: function() {},
+    csi: function() {},
+    app: {}
+};
+
+// Mock webkit object
+window.webkit = {
+    messageHandlers: {}
+};
+"""
+
+
+# ---------------- Shared Playwright browser ----------------
+class PlaywrightPool:
+    """One Playwright driver and one Chromium process shared by every scrape.
+
+    Callers open a cheap BrowserContext per request instead of paying the
+    Chromium cold start each time.
+    """
+
+    def __init__(self, headless=BROWSER_HEADLESS):
+        self.headless = headless
+        self.playwright = None
+        self.browser = None
+        self.loop = None
+        self._lock = None
+
+    async def get_browser(self):
+        """Return the shared browser, launching it on first use"""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # The Playwright driver connection is bound to the loop that started it
+            self.loop = loop
+            self._lock = asyncio.Lock()
+            self.playwright = None
+            self.browser = None
+
+        async with self._lock:
+            if self.browser is None or not self.browser.is_connected():
+                if self.playwright is None:
+                    self.playwright = await async_playwright().start()
+                try:
+                    self.browser = await self._launch()
+                except Exception as e:
+                    # A crashed browser can take the driver down with it; restart both once
+                    logger.warning(f"⚠️ Browser launch failed, restarting Playwright driver: {str(e)}")
+                    try:
+                        await self.playwright.stop()
+                    except Exception:
+                        pass
+                    self.playwright = await async_playwright().start()
+                    self.browser = await self._launch()
+                logger.info("🚀 Launched shared Chromium browser")
+        return self.browser
+
+    async def _launch(self):
+        browser = await self.playwright.chromium.launch(
+            headless=self.headless,
+            args=BROWSER_LAUNCH_ARGS
+        )
+        browser.on("disconnected", lambda _: logger.warning("⚠️ Shared browser disconnected, relaunching on next request"))
+        return browser
+
+    async def close(self):
+        """Close the shared browser and stop the Playwright driver"""
         try:
-            with open(config_file, 'w') as f:
-                json.dump(config, f, indent=2)
-            logger.info("✅ Auth config saved successfully")
-            return True
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
         except Exception as e:
-            logger.error(f"❌ Error saving auth config: {str(e)}")
-            return False
+            logger.warning(f"⚠️ Error closing browser/playwright: {str(e)}")
+        finally:
+            self.browser = None
+            self.playwright = None
+
+    def warm_up(self, loop):
+        """Launch the browser in the background so the first request skips the cold start"""
+        def report(future):
+            if future.exception():
+                logger.warning(f"⚠️ Browser warm-up failed, will retry on first request: {str(future.exception())}")
+
+        asyncio.run_coroutine_threadsafe(self.get_browser(), loop).add_done_callback(report)
+
+    def shutdown(self):
+        """Synchronous teardown for interpreter exit"""
+        if self.loop is None or self.loop.is_closed():
+            return
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.close(), self.loop).result(timeout=10)
+        else:
+            self.loop.run_until_complete(self.close())
+
+
+playwright_pool = None
+
+
+# ---------------- Request routing ----------------
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet"})
+# Product details are read from the server-rendered document, so nothing else is needed
+DETAIL_BLOCKED_RESOURCE_TYPES = BLOCKED_RESOURCE_TYPES | {
+    "script", "xhr", "fetch", "websocket", "eventsource", "manifest", "texttrack", "other"
+}
+# Ad and analytics hosts; their iframes are documents, so resource type alone lets them through
+BLOCKED_HOSTS_RE = re.compile(
+    r"^https?://[^/]*(amazon-adsystem\.com|doubleclick\.net|googlesyndication\.com"
+    r"|googletagmanager\.com|google-analytics\.com)[:/]"
+)
+
+
+async def block_heavy_resources(route):
+    """Abort requests for resources the scraper never reads"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_HOSTS_RE.match(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# The sign-in flow checks element visibility, which only means something with the site's CSS applied
+LOGIN_BLOCKED_RESOURCE_TYPES = BLOCKED_RESOURCE_TYPES - {"stylesheet"}
+
+
+async def block_login_resources(route):
+    """Like block_heavy_resources, but let stylesheets through while logging in"""
+    request = route.request
+    if request.resource_type in LOGIN_BLOCKED_RESOURCE_TYPES or BLOCKED_HOSTS_RE.match(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
 
-    def load_session_cookies():
-        """Load saved session cookies from file"""
+
+async def block_non_document_resources(route):
+    """Abort everything a server-rendered read (product details, search results) does not need.
+
+    Registered per page, so it overrides the context route for that page only.
+    """
+    request = route.request
+    if request.resource_type in DETAIL_BLOCKED_RESOURCE_TYPES or BLOCKED_HOSTS_RE.match(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# ---------------- Background event loop ----------------
+background_loop = None
+
+
+def start_background_loop():
+    """Start the single asyncio loop that runs every scrape coroutine"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="scraper-loop", daemon=True)
+    thread.start()
+    return loop
+
+
+def run_async(coro, timeout=REQUEST_TIMEOUT):
+    """Run a coroutine on the background loop and block until it finishes
+
+    On timeout the coroutine is cancelled, so its finally blocks close any
+    context it opened, and TimeoutError is raised to the caller.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, background_loop)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        logger.error(f"⏱️ Request timed out after {timeout}s")
+        raise
+
+
+# ---------------- Shared HTTP session ----------------
+http_session = None
+
+
+async def get_http_session():
+    """Return the shared aiohttp session, creating it on the background loop"""
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=128, limit_per_host=8),
+            timeout=aiohttp.ClientTimeout(total=20)
+        )
+    return http_session
+
+
+async def close_http_session():
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+
+
+# ---------------- Scrape concurrency ----------------
+# Created unbound; it attaches to the background loop on first use
+scrape_slots = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+
+async def bounded(coro):
+    """Await a per-product scrape once one of the SCRAPE_CONCURRENCY slots is free"""
+    async with scrape_slots:
+        return await coro
+
+
+# ---------------- JSON serialization ----------------
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; covers jsonify() and dict returns alike"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+# ---------------- Helper: Generate Excel file from review data ----------------
+def export_basename(search_term, generated_at):
+    """Export filename without extension; the .xlsx and .csv downloads share it"""
+    timestamp = generated_at.strftime("%Y%m%d_%H%M%S")
+    return f"amazon_reviews_{search_term.replace(' ', '_')}_{timestamp}"
+
+
+def attachment_filename_options(filename):
+    """Content-Disposition filename options, as send_file builds them
+
+    Header values must be latin-1, so a non-ASCII name (keyword in any script)
+    gets an ASCII fallback plus an RFC 5987 filename* that browsers prefer.
+    """
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        return {"filename": simple, "filename*": f"UTF-8''{quote(filename, safe='!#$&+^`|~')}"}
+    return {"filename": filename}
+
+
+def export_rows(search_term, products, generated_at):
+    """Rows of the review export, shared by the XLSX and CSV writers"""
+    # Headers and summary information
+    yield ('Product', 'Reviewer Name', 'Rating', 'Date', 'Review Text', 'Helpful Votes')
+    yield ('SUMMARY', f'Search Term: {search_term}', None, generated_at.strftime("%Y-%m-%d %H:%M:%S"))
+
+    # Process each product
+    for i, product in enumerate(products, 1):
+        # Add product header
+        product_title = product["title"][:50] + "..." if len(product["title"]) > 50 else product["title"]
+        yield (
+            f'PRODUCT {i}: {product_title}',
+            product["url"],
+            f'Reviews: {product["reviews_count"]}',
+            'Success: Yes' if product["success"] else 'Success: No'
+        )
+
+        # Add reviews for this product
+        for review in product.get("reviews", []):
+            yield (product_title, *map(review.get, REVIEW_EXPORT_FIELDS))
+
+
+# The export is one sheet of plain strings, so the workbook package is written by hand:
+# fixed parts below plus a sheet streamed row by row into the zip
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Amazon Reviews" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+XLSX_MAX_CELL_CHARS = 32767  # Excel's per-cell text limit
+# Review columns after Product; a missing field becomes an empty cell
+REVIEW_EXPORT_FIELDS = ("reviewer_name", "rating", "date", "text", "helpful_votes")
+# Escape markup and drop the control characters XML 1.0 cannot carry
+XML_TEXT_TABLE = str.maketrans({
+    "&": "&amp;", "<": "&lt;", ">": "&gt;",
+    **{chr(c): None for c in range(32) if c not in (9, 10, 13)}
+})
+
+
+def xlsx_row(row_num, values):
+    """One <row> of inline-string cells; None and "" become empty cells"""
+    cells = []
+    for value in values:
+        if value is None or value == "":
+            cells.append("<c/>")
+        else:
+            text = str(value)[:XLSX_MAX_CELL_CHARS].translate(XML_TEXT_TABLE)
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{row_num}">{"".join(cells)}</row>'
+
+
+def write_excel_file(search_term, products, generated_at, target):
+    """Write review data organized by product as xlsx to a path or file object"""
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, xml)
+
+        # The sheet is deflated as it is written, so no row list is ever held in memory
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as raw, \
+                io.TextIOWrapper(raw, encoding="utf-8") as sheet:
+            sheet.write(XLSX_SHEET_HEAD)
+            for row_num, values in enumerate(export_rows(search_term, products, generated_at), 1):
+                sheet.write(xlsx_row(row_num, values))
+            sheet.write(XLSX_SHEET_TAIL)
+
+
+def csv_chunks(search_term, products, generated_at, chunk_size=64 << 10):
+    """The review export as CSV text, yielded in ~chunk_size pieces for streaming"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for values in export_rows(search_term, products, generated_at):
+        writer.writerow(values)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def generate_excel_file(search_term, products, generated_at=None, filename=None):
+    """Generate Excel file with review data in the exports directory (created by create_app)"""
+    generated_at = generated_at or datetime.now()
+    filename = filename or export_basename(search_term, generated_at) + ".xlsx"
+    filepath = os.path.join(EXPORTS_DIR, filename)
+
+    write_excel_file(search_term, products, generated_at, filepath)
+
+    return filepath, filename
+
+
+def cached_excel_file(filename, export):
+    """Path of the xlsx for an EXPORTS_CACHE entry, rendered once into EXPORTS_TMP_DIR
+
+    Repeated and resumed downloads reuse the same file, so its ETag holds across
+    Range requests. Files older than the cache TTL are pruned on each new render.
+    """
+    filepath = os.path.join(EXPORTS_TMP_DIR, filename)
+    if os.path.exists(filepath):
+        return filepath
+
+    cutoff = time.time() - EXPORTS_CACHE.ttl
+    for entry in os.scandir(EXPORTS_TMP_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+    # Render under a unique name, then rename, so concurrent downloads never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORTS_TMP_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_excel_file(*export, target=f)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return filepath
+
+
+def generate_csv_file(search_term, products, generated_at=None, filename=None):
+    """Generate CSV file with review data in the exports directory (created by create_app)"""
+    generated_at = generated_at or datetime.now()
+    filename = filename or export_basename(search_term, generated_at) + ".csv"
+    filepath = os.path.join(EXPORTS_DIR, filename)
+
+    with open(filepath, 'w', newline='', encoding='utf-8') as f:
+        f.writelines(csv_chunks(search_term, products, generated_at))
+
+    return filepath, filename
+
+
+# ---------------- Helper: Cached JSON file reads ----------------
+AUTH_CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'auth_config.json')
+_json_file_cache = {}  # path -> (st_mtime_ns, parsed JSON)
+
+
+def read_json_file(path):
+    """Parsed JSON of path, re-read only when its mtime changes; None if the file is missing"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _json_file_cache.pop(path, None)
+        return None
+    cached = _json_file_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        value = orjson.loads(f.read())
+    _json_file_cache[path] = (mtime, value)
+    return value
+
+
+# ---------------- Helper: Load/Save authentication config ----------------
+def load_auth_config():
+    """Load authentication configuration from file"""
+    try:
+        config = read_json_file(AUTH_CONFIG_FILE)
+        if config is not None:
+            # Merge with default config; callers edit the result, so never hand out cached dicts
+            merged_config = {**AUTO_AUTH_CONFIG, **config}
+            merged_config['credentials'] = dict(merged_config['credentials'])
+            return merged_config
+    except Exception as e:
+        logger.warning(f"⚠️ Error loading auth config: {str(e)}")
+    return {**AUTO_AUTH_CONFIG, 'credentials': dict(AUTO_AUTH_CONFIG['credentials'])}
+
+def save_auth_config(config):
+    """Save authentication configuration to file"""
+    config_file = AUTH_CONFIG_FILE
+    _json_file_cache.pop(config_file, None)
+    try:
+        with open(config_file, 'w') as f:
+            json.dump(config, f, indent=2)
+        logger.info("✅ Auth config saved successfully")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Error saving auth config: {str(e)}")
+        return False
+
+def load_session_cookies(auth_config=None):
+    """Load saved session cookies from file"""
+    if auth_config is None:
+        auth_config = load_auth_config()
+    session_file = os.path.join(os.path.dirname(__file__), auth_config['session_file'])
+    try:
+        session_data = read_json_file(session_file)
+        if session_data is not None:
+            # Check if cookies are recent (within 24 hours)
+            timestamp = session_data.get('timestamp')
+            if timestamp:
+                saved_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00').replace('+00:00', ''))
+                if datetime.now() - saved_time > timedelta(hours=24):
+                    logger.warning("⚠️ Session cookies are older than 24 hours, will need fresh login")
+                    return []
+            logger.info("✅ Loaded existing session cookies")
+            return session_data.get('cookies', [])
+    except Exception as e:
+        logger.warning(f"⚠️ Error loading session cookies: {str(e)}")
+    return []
+
+def save_session_cookies(cookies, auth_config=None):
+    """Save current session cookies to file"""
+    if auth_config is None:
         auth_config = load_auth_config()
-        session_file = os.path.join(os.path.dirname(__file__), auth_config['session_file'])
-        if os.path.exists(session_file):
+    session_file = os.path.join(os.path.dirname(__file__), auth_config['session_file'])
+    _json_file_cache.pop(session_file, None)
+    try:
+        session_data = {
+            'cookies': cookies,
+            'timestamp': datetime.now().isoformat()
+        }
+        with open(session_file, 'w') as f:
+            json.dump(session_data, f, indent=2)
+        logger.info("✅ Session cookies saved successfully")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Error saving session cookies: {str(e)}")
+        return False
+
+
+# ---------------- Helper: Load/Save browser storage state ----------------
+# Cookies + localStorage from a successful search, so fresh contexts skip Amazon's cold-visit interstitials
+STORAGE_STATE_FILE = os.path.join(os.path.dirname(__file__), 'amazon_state.json')
+STORAGE_STATE_MAX_AGE = 7 * 24 * 3600  # re-prime weekly
+# Amazon's sign-in cookies (at-main, sess-at-main, x-main, sst-main, session-token); never snapshotted,
+# so the shared state cannot outlive a logout - logins go through the session file instead
+AUTH_COOKIE_PREFIXES = ("at-", "sess-at-", "x-", "sst-", "session-token")
+_storage_state = None  # (saved_at, state), read from disk once
+
+
+def load_storage_state():
+    """Return the saved storage state, or None if there is none or it is stale"""
+    global _storage_state
+    if _storage_state is None:
+        try:
+            with open(STORAGE_STATE_FILE, 'rb') as f:
+                _storage_state = (os.path.getmtime(STORAGE_STATE_FILE), orjson.loads(f.read()))
+        except (OSError, ValueError):
+            _storage_state = (0.0, None)
+    saved_at, state = _storage_state
+    return state if time.time() - saved_at < STORAGE_STATE_MAX_AGE else None
+
+
+async def save_storage_state(context):
+    """Snapshot the context's storage state unless a fresh one is already saved"""
+    global _storage_state
+    if load_storage_state() is not None:
+        return
+    state = await context.storage_state()
+    state["cookies"] = [
+        cookie for cookie in state["cookies"]
+        if not cookie["name"].startswith(AUTH_COOKIE_PREFIXES)
+    ]
+    _storage_state = (time.time(), state)
+    try:
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_file = STORAGE_STATE_FILE + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(state))
+        os.replace(tmp_file, STORAGE_STATE_FILE)
+        logger.info("✅ Saved browser storage state")
+    except OSError as e:
+        logger.warning(f"⚠️ Error saving browser storage state: {str(e)}")
+
+
+def clear_storage_state():
+    """Drop the saved storage state so new contexts start from a clean browser"""
+    global _storage_state
+    _storage_state = None
+    try:
+        os.remove(STORAGE_STATE_FILE)
+        logger.info("✅ Browser storage state removed")
+    except FileNotFoundError:
+        pass
+
+
+# ---------------- Shared login session ----------------
+SESSION_REVALIDATE_SECONDS = 600  # trust a validated login this long before checking it again
+LOGIN_RETRY_SECONDS = 120  # after a failed login, contexts stay anonymous this long instead of retrying
+
+
+class LoginSession:
+    """Amazon login state shared by every context on the background loop.
+
+    Once a context validates its cookies or logs in, later contexts reuse those
+    cookies from memory and skip the homepage check until the session goes stale.
+    A failed login is remembered too, so waiting contexts don't each repeat it.
+    """
+
+    def __init__(self):
+        self.cookies = None
+        self.validated_at = None
+        self.failed_at = None
+        self.loop = None
+        self._lock = None
+
+    def lock(self):
+        """Lock serializing validation/login, bound to the running loop"""
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def is_fresh(self):
+        return self.validated_at is not None and time.monotonic() - self.validated_at < SESSION_REVALIDATE_SECONDS
+
+    def recently_failed(self):
+        return self.failed_at is not None and time.monotonic() - self.failed_at < LOGIN_RETRY_SECONDS
+
+    async def remember(self, context):
+        """Record the context's cookies as the current logged-in session"""
+        self.cookies = await context.cookies()
+        self.validated_at = time.monotonic()
+        self.failed_at = None
+
+    def fail(self):
+        """Record a failed login; contexts skip logging in until LOGIN_RETRY_SECONDS pass"""
+        self.cookies = None
+        self.validated_at = None
+        self.failed_at = time.monotonic()
+
+    def forget(self):
+        self.cookies = None
+        self.validated_at = None
+        self.failed_at = None
+
+
+login_session = LoginSession()
+
+
+# ---------------- Helper: Amazon Auto Login ----------------
+# Amazon's "dog page" and soft-block pages announce themselves in a heading or alert banner
+ERROR_BANNER_SELECTOR = 'h1, h2, .a-alert-heading'
+ERROR_PAGE_MARKERS = ("Looking for Something?", "We're sorry")
+BANNER_TEXTS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector), (el) => el.textContent.trim()).join("\\n")
+"""
+
+
+# Whether the page reads like the sign-in form; answered in the page instead of shipping its HTML back
+SIGNIN_PAGE_JS = """
+() => {
+    const text = ((document.body && document.body.innerText) || "").toLowerCase();
+    return text.includes("sign in") || text.includes("email") || !!document.querySelector('input[name="email"], input[type="email"]');
+}
+"""
+
+
+async def error_page_marker(page, markers=ERROR_PAGE_MARKERS):
+    """First error marker found in the page's headings/alerts, or None"""
+    try:
+        banners = await page.evaluate(BANNER_TEXTS_JS, ERROR_BANNER_SELECTOR)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read page banners: {str(e)}")
+        return None
+    return next((marker for marker in markers if marker.lower() in banners.lower()), None)
+
+
+# Index, text and href of every selector with a visible match, in selector order;
+# invalid CSS (Playwright-only syntax) never matches
+VISIBLE_MATCHES_JS = """
+(selectors) => {
+    const visible = (el) => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== "hidden";
+    const found = [];
+    selectors.forEach((selector, i) => {
+        let matches;
+        try { matches = document.querySelectorAll(selector); } catch (e) { return; }
+        const el = Array.from(matches).find(visible);
+        if (el) found.push([i, (el.textContent || "").trim(), el.getAttribute("href")]);
+    });
+    return found;
+}
+"""
+CLICK_TIMEOUT = 5000  # a visible candidate that can't be clicked this fast is skipped for the next one
+
+
+def is_playwright_selector(selector):
+    """True for Playwright-only selector syntax that document.querySelector rejects"""
+    return selector.startswith("text=") or ":has-text(" in selector
+
+
+async def click_visible(page, selector, label):
+    """Click the first visible match of selector; True on success"""
+    try:
+        await page.locator(selector).locator("visible=true").first.click(timeout=CLICK_TIMEOUT)
+        logger.info(f"✅ Clicked {label}: {selector}")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not click {label} '{selector}': {str(e)}")
+        return False
+
+
+async def click_first_present(page, selectors, label):
+    """Click the first selector with a visible match, moving on when a click fails.
+
+    CSS selectors are probed together in one evaluate; Playwright-only selectors
+    are checked with locators only when none of them could be clicked.
+    Returns the selector clicked or None.
+    """
+    try:
+        matches = await page.evaluate(VISIBLE_MATCHES_JS, selectors)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not probe {label}: {str(e)}")
+        matches = []
+    for index, text, href in matches:
+        selector = selectors[index]
+        logger.info(f"✅ Found {label} '{selector}': text='{text[:60]}', href='{href}'")
+        if await click_visible(page, selector, label):
+            return selector
+    for selector in selectors:
+        if is_playwright_selector(selector):
             try:
-                with open(session_file, 'r') as f:
-                    session_data = json.load(f)
-                    # Check if cookies are recent (within 24 hours)
-                    timestamp = session_data.get('timestamp')
-                    if timestamp:
-                        from datetime import datetime, timedelta
-                        saved_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00').replace('+00:00', ''))
-                        if datetime.now() - saved_time > timedelta(hours=24):
-                            logger.warning("⚠️ Session cookies are older than 24 hours, will need fresh login")
-                            return []
-                    logger.info("✅ Loaded existing session cookies")
-                    return session_data.get('cookies', [])
+                if await page.locator(selector).locator("visible=true").count() == 0:
+                    continue
             except Exception as e:
-                logger.warning(f"⚠️ Error loading session cookies: {str(e)}")
-        return []
+                logger.warning(f"⚠️ Could not probe {label} '{selector}': {str(e)}")
+                continue
+            if await click_visible(page, selector, label):
+                return selector
+    return None
+
+
+# ---------------- Login outcome detection ----------------
+LOGIN_SUCCESS_SELECTORS = [
+    '#nav-link-accountList',
+    '[data-nav-id="nav_ya_signin"]',
+    '.nav-line-1',
+    '.nav-line-2'
+]
+LOGIN_ERROR_SELECTORS = [
+    '.a-alert-error',
+    '[data-testid="auth-error"]',
+    '.a-box-information .a-alert-heading',
+    '.a-alert-content',
+    '[id*="error"]',
+    '.error-message',
+    '.a-alert-heading'
+]
+# Error banners that end the attempt, checked in order; other banner text is ignored
+LOGIN_ERROR_KEYWORDS = [
+    ["captcha", ['captcha', 'verify', 'robot', 'automated']],
+    ["twofa", ['2fa', 'two-factor', 'verification code', 'sms', 'phone']],
+    ["credentials", ['incorrect', 'wrong', 'invalid', 'failed']]
+]
+LOGIN_ERROR_MESSAGES = {
+    "captcha": "❌ CAPTCHA/Verification detected - manual intervention required",
+    "twofa": "❌ 2FA detected - manual intervention required",
+    "credentials": "❌ Invalid credentials detected"
+}
+TWOFA_TEXTS = ['enter the code', 'verification code', 'two-factor', '2fa']
+TWOFA_INPUT_SELECTOR = 'input[placeholder*="code" i], input[placeholder*="verification" i]'
+
+# [outcome, detail] once the sign-in submit resolves one way or the other, false while still pending
+LOGIN_OUTCOME_JS = """
+([successSelectors, errorSelectors, errorKeywords, twofaTexts, twofaInputSelector]) => {
+    const textOf = (selector) => {
+        const el = document.querySelector(selector);
+        return el ? (el.textContent || "").trim() : "";
+    };
+    for (const selector of successSelectors) {
+        const text = textOf(selector);
+        if (text.includes("Hello") && !text.toLowerCase().includes("sign in")) return ["ok", text];
+    }
+
+    const errorText = errorSelectors.map(textOf).find((text) => text);
+    if (errorText) {
+        const lower = errorText.toLowerCase();
+        for (const [kind, keywords] of errorKeywords) {
+            if (keywords.some((keyword) => lower.includes(keyword))) return [kind, errorText];
+        }
+    }
 
-    def save_session_cookies(cookies):
-        """Save current session cookies to file"""
-        auth_config = load_auth_config()
-        session_file = os.path.join(os.path.dirname(__file__), auth_config['session_file'])
-        try:
-            session_data = {
-                'cookies': cookies,
-                'timestamp': datetime.now().isoformat()
-            }
-            with open(session_file, 'w') as f:
-                json.dump(session_data, f, indent=2)
-            logger.info("✅ Session cookies saved successfully")
-            return True
-        except Exception as e:
-            logger.error(f"❌ Error saving session cookies: {str(e)}")
-            return False
+    const pageText = document.body ? document.body.innerText.toLowerCase() : "";
+    if (twofaTexts.some((text) => pageText.includes(text)) || document.querySelector(twofaInputSelector)) {
+        return ["twofa-page", null];
+    }
 
-    # ---------------- Helper: Amazon Auto Login ----------------
-    async def auto_login_amazon(page):
-        """Automatically log in to Amazon using stored credentials"""
-        auth_config = load_auth_config()
+    if (!location.href.toLowerCase().includes("signin") && textOf(successSelectors[0]).includes("Hello")) {
+        return ["redirected", null];
+    }
+    return false;
+}
+"""
+
+
+async def fill_first_visible(page, selectors, value, label, timeout=10000):
+    """Fill whichever of the selectors becomes visible first; False if none does within timeout.
+
+    All candidates are waited on at once through one union selector, so a missing
+    selector no longer costs its own full timeout before the next is tried. Hidden
+    matches are filtered out first, so a hidden decoy earlier in the DOM never wins.
+    """
+    field = page.locator(", ".join(selectors)).locator("visible=true").first
+    try:
+        await field.wait_for(state="visible", timeout=timeout)
+        await field.fill(value)
+        logger.info(f"✅ Filled {label} field")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fill {label}: {str(e)}")
+        return False
+
+
+async def auto_login_amazon(page):
+    """Automatically log in to Amazon using stored credentials"""
+    auth_config = load_auth_config()
+    
+    if not auth_config['enabled']:
+        logger.info("🔓 Auto auth is disabled, continuing as anonymous user")
+        return False
         
-        if not auth_config['enabled']:
-            logger.info("🔓 Auto auth is disabled, continuing as anonymous user")
-            return False
-            
-        if not auth_config['credentials']['email'] or not auth_config['credentials']['password']:
-            logger.warning("⚠️ Auto auth enabled but credentials not set")
-            return False
+    if not auth_config['credentials']['email'] or not auth_config['credentials']['password']:
+        logger.warning("⚠️ Auto auth enabled but credentials not set")
+        return False
 
+    try:
+        logger.info("🔐 Starting auto login to Amazon...")
+        
+        # Quick check if already logged in by looking for account info
         try:
-            logger.info("🔐 Starting auto login to Amazon...")
-            
-            # Quick check if already logged in by looking for account info
-            try:
-                account_indicator = page.locator('#nav-link-accountList')
-                if await account_indicator.count() > 0:
-                    account_text = await account_indicator.text_content()
-                    if account_text and 'Hello' in account_text and 'sign in' not in account_text.lower():
-                        logger.info("✅ Already logged in to Amazon")
-                        return True
-            except:
-                pass
-
-            # Navigate to Amazon homepage first
-            logger.info("🌐 Navigating to Amazon homepage...")
-            await page.goto("https://www.amazon.com", timeout=20000)
+            account_indicator = page.locator('#nav-link-accountList')
+            if await account_indicator.count() > 0:
+                account_text = await account_indicator.text_content()
+                if account_text and 'Hello' in account_text and 'sign in' not in account_text.lower():
+                    logger.info("✅ Already logged in to Amazon")
+                    return True
+        except:
+            pass
+
+        # Navigate to Amazon homepage first
+        logger.info("🌐 Navigating to Amazon homepage...")
+        await page.goto(AMAZON_BASE, timeout=20000)
+        await human_delay(2000, 3000)
+        
+        # Add some human-like behavior
+        await human_scroll(page, max_scrolls=1)
+        await human_delay(1000, 2000)
+        
+        # Try multiple approaches to find and click sign-in
+        signin_clicked = False
+        signin_selectors = [
+            '#nav-link-accountList',
+            'a[href*="signin"]',
+            'a[href*="ap/signin"]',
+            '.nav-line-1',
+            '#nav-link-accountList .nav-line-1',
+            '[data-nav-id="nav_ya_signin"]',
+            '.nav-line-2',
+            '#nav-link-accountList .nav-line-2',
+            'a[href*="homepage.html"]',  # Your Account link
+            'text=Your Account',
+            'text=Account & Lists',
+            'text=Hello, Sign in'
+        ]
+        
+        logger.info("🔍 Looking for sign-in elements...")
+        if await click_first_present(page, signin_selectors, "sign-in element"):
             await page.wait_for_load_state("domcontentloaded")
             await human_delay(2000, 3000)
-            
-            # Add some human-like behavior
-            await human_scroll(page, max_scrolls=1)
-            await human_delay(1000, 2000)
-            
-            # Try multiple approaches to find and click sign-in
-            signin_clicked = False
-            signin_selectors = [
-                '#nav-link-accountList',
-                'a[href*="signin"]',
-                'a[href*="ap/signin"]',
-                '.nav-line-1',
-                '#nav-link-accountList .nav-line-1',
-                '[data-nav-id="nav_ya_signin"]',
-                '.nav-line-2',
-                '#nav-link-accountList .nav-line-2',
-                'a[href*="homepage.html"]',  # Your Account link
-                'text=Your Account',
+            signin_clicked = True
+        
+        if not signin_clicked:
+            # Try alternative approach - look for "Account & Lists" or similar
+            logger.info("🔍 Trying alternative sign-in approach...")
+            alt_selectors = [
                 'text=Account & Lists',
-                'text=Hello, Sign in'
+                'text=Hello, Sign in',
+                'text=Sign in',
+                '[data-nav-id="nav_ya_signin"]',
+                '.nav-line-1:has-text("Hello")',
+                '.nav-line-2:has-text("Sign in")'
             ]
             
-            logger.info("🔍 Looking for sign-in elements...")
-            for selector in signin_selectors:
-                try:
-                    signin_element = page.locator(selector)
-                    if await signin_element.count() > 0:
-                        # Get element text for debugging
-                        element_text = await signin_element.text_content()
-                        element_href = await signin_element.get_attribute('href')
-                        logger.info(f"✅ Found sign-in element '{selector}': text='{element_text}', href='{element_href}'")
-                        
-                        # Try to click it
-                        await signin_element.click()
-                        logger.info(f"✅ Clicked sign-in element: {selector}")
-                        await page.wait_for_load_state("domcontentloaded")
-                        await human_delay(2000, 3000)
-                        signin_clicked = True
-                        break
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not click sign-in with selector {selector}: {str(e)}")
-                    continue
-            
-            if not signin_clicked:
-                # Try alternative approach - look for "Account & Lists" or similar
-                logger.info("🔍 Trying alternative sign-in approach...")
-                alt_selectors = [
-                    'text=Account & Lists',
-                    'text=Hello, Sign in',
-                    'text=Sign in',
-                    '[data-nav-id="nav_ya_signin"]',
-                    '.nav-line-1:has-text("Hello")',
-                    '.nav-line-2:has-text("Sign in")'
-                ]
-                
-                for selector in alt_selectors:
-                    try:
-                        element = page.locator(selector)
-                        if await element.count() > 0:
-                            await element.click()
-                            logger.info(f"✅ Clicked alternative sign-in element: {selector}")
-                            await page.wait_for_load_state("domcontentloaded")
-                            await human_delay(2000, 3000)
-                            signin_clicked = True
-                            break
-                    except Exception as e:
-                        logger.warning(f"⚠️ Could not click alternative selector {selector}: {str(e)}")
-                        continue
-            
-            # Check for error pages after navigation
-            page_content = await page.content()
-            if "Looking for Something?" in page_content or "We're sorry" in page_content:
-                logger.error("❌ Amazon shows error page - may be blocking automated access")
-                # Try a different approach - go to a specific product page first
-                logger.info("🔄 Trying workaround - navigating to a product page first...")
-                await page.goto("https://www.amazon.com/dp/B08N5WRWNW", timeout=20000)  # Popular product
+            if await click_first_present(page, alt_selectors, "alternative sign-in element"):
                 await page.wait_for_load_state("domcontentloaded")
                 await human_delay(2000, 3000)
-                
-                # Now try to find sign-in from product page
-                for selector in signin_selectors:
-                    try:
-                        signin_element = page.locator(selector)
-                        if await signin_element.count() > 0:
-                            await signin_element.click()
-                            logger.info(f"✅ Clicked sign-in from product page: {selector}")
-                            await page.wait_for_load_state("domcontentloaded")
-                            await human_delay(2000, 3000)
-                            signin_clicked = True
-                            break
-                    except Exception as e:
-                        continue
-                
-                # Check again for errors
-                page_content = await page.content()
-                if "Looking for Something?" in page_content:
-                    logger.error("❌ Still getting error page - Amazon may be blocking automated access")
-                    return False
-            
-            # Check if we're actually on a sign-in page
-            if not signin_clicked:
-                logger.error("❌ Could not find or click any sign-in elements")
-                return False
-            
-            # Wait for sign-in page to load properly - use domcontentloaded instead of networkidle
-            await page.wait_for_load_state("domcontentloaded")
+                signin_clicked = True
+        
+        # Check for error pages after navigation
+        if await error_page_marker(page):
+            logger.error("❌ Amazon shows error page - may be blocking automated access")
+            # Try a different approach - go to a specific product page first
+            logger.info("🔄 Trying workaround - navigating to a product page first...")
+            await page.goto("https://www.amazon.com/dp/B08N5WRWNW", timeout=20000)  # Popular product
             await human_delay(2000, 3000)
             
-            # Final check for sign-in page
-            page_content = await page.content()
-            if "sign in" not in page_content.lower() and "email" not in page_content.lower():
-                logger.error("❌ Not on Amazon sign-in page after navigation")
-                return False
-            
-            # Wait for email input field with explicit wait
-            logger.info("🔍 Waiting for email input field...")
-            email_selectors = [
-                'input[name="email"]',
-                'input[id="ap_email"]', 
-                'input[type="email"]',
-                'input[placeholder*="email" i]',
-                'input[placeholder*="Email" i]'
-            ]
-            
-            email_filled = False
-            for email_selector in email_selectors:
-                try:
-                    # Wait for element to be visible and fillable
-                    await page.wait_for_selector(email_selector, timeout=10000)
-                    await page.fill(email_selector, auth_config['credentials']['email'])
-                    logger.info(f"✅ Filled email using selector: {email_selector}")
-                    email_filled = True
-                    break
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not fill email with selector {email_selector}: {str(e)}")
-                    continue
-            
-            if not email_filled:
-                logger.error("❌ Could not find email input field")
-                return False
-            
-            await human_delay(500, 800)
-            
-            # Click continue button if present
-            try:
-                continue_selectors = [
-                    'input[id="continue"]',
-                    'input[type="submit"][value*="Continue"]',
-                    'input[type="submit"][value*="continue"]',
-                    'button[type="submit"]:has-text("Continue")',
-                    'input[aria-labelledby="continue-announce"]'
-                ]
-                
-                for continue_selector in continue_selectors:
-                    try:
-                        continue_btn = page.locator(continue_selector)
-                        if await continue_btn.count() > 0:
-                            await continue_btn.click()
-                            logger.info(f"✅ Clicked continue button: {continue_selector}")
-                            await page.wait_for_load_state("domcontentloaded")
-                            await human_delay(1000, 1500)
-                            break
-                    except:
-                        continue
-            except Exception as e:
-                logger.warning(f"⚠️ Could not click continue button: {str(e)}")
-
-            # Wait for password field and fill it
-            logger.info("🔍 Waiting for password input field...")
-            password_selectors = [
-                'input[name="password"]',
-                'input[id="ap_password"]',
-                'input[type="password"]',
-                'input[placeholder*="password" i]',
-                'input[placeholder*="Password" i]'
-            ]
-            
-            password_filled = False
-            for password_selector in password_selectors:
-                try:
-                    # Wait for element to be visible and fillable
-                    await page.wait_for_selector(password_selector, timeout=10000)
-                    await page.fill(password_selector, auth_config['credentials']['password'])
-                    logger.info(f"✅ Filled password using selector: {password_selector}")
-                    password_filled = True
-                    break
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not fill password with selector {password_selector}: {str(e)}")
-                    continue
+            # Now try to find sign-in from product page
+            if await click_first_present(page, signin_selectors, "sign-in from product page"):
+                await page.wait_for_load_state("domcontentloaded")
+                await human_delay(2000, 3000)
+                signin_clicked = True
             
-            if not password_filled:
-                logger.error("❌ Could not find password input field")
+            # Check again for errors
+            if await error_page_marker(page, ERROR_PAGE_MARKERS[:1]):
+                logger.error("❌ Still getting error page - Amazon may be blocking automated access")
                 return False
+        
+        # Check if we're actually on a sign-in page
+        if not signin_clicked:
+            logger.error("❌ Could not find or click any sign-in elements")
+            return False
+        
+        # Wait for sign-in page to load properly - use domcontentloaded instead of networkidle
+        # (every path here already paused 2-3s right after its click)
+        await page.wait_for_load_state("domcontentloaded")
+        
+        # Final check for sign-in page
+        if not await page.evaluate(SIGNIN_PAGE_JS):
+            logger.error("❌ Not on Amazon sign-in page after navigation")
+            return False
+        
+        # Wait for email input field with explicit wait
+        logger.info("🔍 Waiting for email input field...")
+        email_selectors = [
+            'input[name="email"]',
+            'input[id="ap_email"]', 
+            'input[type="email"]',
+            'input[placeholder*="email" i]',
+            'input[placeholder*="Email" i]'
+        ]
+        
+        email_filled = await fill_first_visible(page, email_selectors, auth_config['credentials']['email'], "email")
 
-            await human_delay(500, 800)
-
-            # Click sign-in button
-            logger.info("🔍 Looking for sign-in button...")
-            signin_btn_selectors = [
-                'input[id="signInSubmit"]',
-                'input[type="submit"]',
-                'button[type="submit"]',
-                'input[value*="Sign in"]',
-                'input[value*="sign in"]',
-                'button:has-text("Sign in")',
-                'button:has-text("sign in")',
-                'input[aria-labelledby="signInSubmit-announce"]'
+        if not email_filled:
+            logger.error("❌ Could not find email input field")
+            return False
+        
+        await human_delay(500, 800)
+        
+        # Click continue button if present
+        try:
+            continue_selectors = [
+                'input[id="continue"]',
+                'input[type="submit"][value*="Continue"]',
+                'input[type="submit"][value*="continue"]',
+                'button[type="submit"]:has-text("Continue")',
+                'input[aria-labelledby="continue-announce"]'
             ]
             
-            signin_clicked = False
-            for signin_selector in signin_btn_selectors:
-                try:
-                    signin_btn = page.locator(signin_selector)
-                    if await signin_btn.count() > 0:
-                        await signin_btn.click()
-                        logger.info(f"✅ Clicked sign-in button: {signin_selector}")
-                        signin_clicked = True
-                        break
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not click sign-in button with selector {signin_selector}: {str(e)}")
-                    continue
-            
-            if not signin_clicked:
-                logger.error("❌ Could not find or click sign-in button")
-                return False
-            
-            # Wait for login to complete with better detection
-            logger.info("⏱️ Monitoring for login completion...")
-            login_detected = False
-            
-            # Check for various success indicators
-            for i in range(30):  # 30 * 500ms = 15 seconds max
-                try:
-                    # Check for immediate login success indicators
-                    success_indicators = [
-                        '#nav-link-accountList:has-text("Hello")',
-                        '#nav-link-accountList:not(:has-text("Sign in"))',
-                        '[data-nav-id="nav_ya_signin"]:not(:has-text("Sign in"))',
-                        '.nav-line-1:has-text("Hello")',
-                        '.nav-line-2:not(:has-text("Sign in"))'
-                    ]
-                    
-                    for indicator in success_indicators:
-                        try:
-                            element = page.locator(indicator)
-                            if await element.count() > 0:
-                                account_text = await element.text_content()
-                                if account_text and 'Hello' in account_text and 'sign in' not in account_text.lower():
-                                    logger.info(f"🚀 Login detected! (after {(i+1)*0.5:.1f}s) - {account_text.strip()}")
-                                    login_detected = True
-                                    break
-                        except:
-                            continue
-                    
-                    if login_detected:
-                        break
-                    
-                    # Check for error messages and special cases
-                    error_selectors = [
-                        '.a-alert-error',
-                        '[data-testid="auth-error"]',
-                        '.a-box-information .a-alert-heading',
-                        '.a-alert-content',
-                        '[id*="error"]',
-                        '.error-message',
-                        '.a-alert-heading',
-                        '.a-alert-content'
-                    ]
-                    
-                    for error_selector in error_selectors:
-                        try:
-                            error_element = page.locator(error_selector)
-                            if await error_element.count() > 0:
-                                error_text = await error_element.text_content()
-                                if error_text and error_text.strip():
-                                    logger.warning(f"⚠️ Login error detected: {error_text.strip()}")
-                                    # Check for specific error types
-                                    error_lower = error_text.lower()
-                                    if any(keyword in error_lower for keyword in ['captcha', 'verify', 'robot', 'automated']):
-                                        logger.error("❌ CAPTCHA/Verification detected - manual intervention required")
-                                        return False
-                                    elif any(keyword in error_lower for keyword in ['2fa', 'two-factor', 'verification code', 'sms', 'phone']):
-                                        logger.error("❌ 2FA detected - manual intervention required")
-                                        return False
-                                    elif any(keyword in error_lower for keyword in ['incorrect', 'wrong', 'invalid', 'failed']):
-                                        logger.error("❌ Invalid credentials detected")
-                                        return False
-                                    break
-                        except:
-                            continue
-                    
-                    # Check for 2FA or verification pages
-                    try:
-                        # Look for 2FA indicators
-                        twofa_indicators = [
-                            'text=Enter the code',
-                            'text=verification code',
-                            'text=Two-factor',
-                            'text=2FA',
-                            'input[placeholder*="code" i]',
-                            'input[placeholder*="verification" i]'
-                        ]
-                        
-                        for indicator in twofa_indicators:
-                            element = page.locator(indicator)
-                            if await element.count() > 0:
-                                logger.error("❌ 2FA/Verification page detected - manual intervention required")
-                                return False
-                    except:
-                        pass
-                    
-                    # Check if we're still on login page (might indicate failure)
-                    current_url = page.url
-                    if 'signin' not in current_url.lower() and 'ap/signin' not in current_url.lower():
-                        # We might have been redirected, check if we're logged in
-                        try:
-                            account_indicator = page.locator('#nav-link-accountList')
-                            if await account_indicator.count() > 0:
-                                account_text = await account_indicator.text_content()
-                                if account_text and 'Hello' in account_text:
-                                    logger.info(f"🚀 Login detected via URL change! (after {(i+1)*0.5:.1f}s)")
-                                    login_detected = True
-                                    break
-                        except:
-                            pass
-                
-                except Exception as e:
-                    logger.warning(f"⚠️ Error during login detection: {str(e)}")
-                
-                await human_delay(500, 500)  # Wait 500ms before next check
-            
-            # Final verification
-            if login_detected:
-                logger.info("✅ Successfully logged in to Amazon")
-                # Save session cookies if persistent session is enabled
-                if auth_config['persistent_session']:
-                    cookies = await page.context.cookies()
-                    save_session_cookies(cookies)
-                return True
-            
-            # One final comprehensive check
-            try:
-                # Check multiple indicators one more time
-                account_indicator = page.locator('#nav-link-accountList')
-                if await account_indicator.count() > 0:
-                    account_text = await account_indicator.text_content()
-                    if account_text and ('Hello' in account_text or 'Account' in account_text) and 'sign in' not in account_text.lower():
-                        logger.info("✅ Login successful (final verification)")
-                        if auth_config['persistent_session']:
-                            cookies = await page.context.cookies()
-                            save_session_cookies(cookies)
-                        return True
-            except:
-                pass
-
-            logger.warning("⚠️ Login may have failed - could not verify account status")
-            logger.info("💡 Tip: You can disable authentication in the settings to continue without login")
+            if await click_first_present(page, continue_selectors, "continue button"):
+                await page.wait_for_load_state("domcontentloaded")
+                await human_delay(1000, 1500)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not click continue button: {str(e)}")
+
+        # Wait for password field and fill it
+        logger.info("🔍 Waiting for password input field...")
+        password_selectors = [
+            'input[name="password"]',
+            'input[id="ap_password"]',
+            'input[type="password"]',
+            'input[placeholder*="password" i]',
+            'input[placeholder*="Password" i]'
+        ]
+        
+        password_filled = await fill_first_visible(page, password_selectors, auth_config['credentials']['password'], "password")
+
+        if not password_filled:
+            logger.error("❌ Could not find password input field")
             return False
 
+        await human_delay(500, 800)
+
+        # Click sign-in button
+        logger.info("🔍 Looking for sign-in button...")
+        signin_btn_selectors = [
+            'input[id="signInSubmit"]',
+            'input[type="submit"]',
+            'button[type="submit"]',
+            'input[value*="Sign in"]',
+            'input[value*="sign in"]',
+            'button:has-text("Sign in")',
+            'button:has-text("sign in")',
+            'input[aria-labelledby="signInSubmit-announce"]'
+        ]
+        
+        signin_clicked = bool(await click_first_present(page, signin_btn_selectors, "sign-in button"))
+
+        if not signin_clicked:
+            logger.error("❌ Could not find or click sign-in button")
+            return False
+        
+        # Wait for login to complete with better detection
+        logger.info("⏱️ Monitoring for login completion...")
+        login_detected = False
+        started = asyncio.get_running_loop().time()
+        try:
+            # Evaluated in the page every 500ms (and again after redirects) until it returns an outcome
+            outcome_handle = await page.wait_for_function(
+                LOGIN_OUTCOME_JS,
+                arg=[LOGIN_SUCCESS_SELECTORS, LOGIN_ERROR_SELECTORS, LOGIN_ERROR_KEYWORDS, TWOFA_TEXTS, TWOFA_INPUT_SELECTOR],
+                polling=500,
+                timeout=15000
+            )
+            outcome, detail = await outcome_handle.json_value()
         except Exception as e:
-            logger.error(f"❌ Auto login failed: {str(e)}")
+            logger.warning(f"⚠️ No login outcome within 15s: {str(e)}")
+            outcome, detail = None, None
+        elapsed = asyncio.get_running_loop().time() - started
+
+        if outcome == "ok":
+            logger.info(f"🚀 Login detected! (after {elapsed:.1f}s) - {detail}")
+            login_detected = True
+        elif outcome == "redirected":
+            logger.info(f"🚀 Login detected via URL change! (after {elapsed:.1f}s)")
+            login_detected = True
+        elif outcome == "twofa-page":
+            logger.error("❌ 2FA/Verification page detected - manual intervention required")
+            return False
+        elif outcome is not None:
+            logger.warning(f"⚠️ Login error detected: {detail}")
+            logger.error(LOGIN_ERROR_MESSAGES[outcome])
             return False
 
-    # ---------------- Helper: Human-like delay ----------------
-    async def human_delay(min_ms=1000, max_ms=3000):
-        await asyncio.sleep(random.uniform(min_ms, max_ms) / 1000)
-    
-    # ---------------- Helper: Safe page navigation with timeout handling ----------------
-    async def safe_navigate(page, url, timeout=60000, max_retries=2):
-        """Navigate to URL with retry logic and better error handling"""
-        for attempt in range(max_retries + 1):
-            try:
-                logger.info(f"🌐 Navigating to {url} (attempt {attempt + 1}/{max_retries + 1})")
-                await page.goto(url, timeout=timeout)
-                await page.wait_for_load_state("domcontentloaded")
-                logger.info(f"✅ Successfully loaded {url}")
-                return True
-            except Exception as e:
-                logger.warning(f"⚠️ Navigation attempt {attempt + 1} failed: {str(e)}")
-                if attempt < max_retries:
-                    await human_delay(2000, 4000)  # Wait before retry
-                    continue
-                else:
-                    logger.error(f"❌ All navigation attempts failed for {url}")
-                    return False
+        # Final verification
+        if login_detected:
+            logger.info("✅ Successfully logged in to Amazon")
+            # Save session cookies if persistent session is enabled
+            if auth_config['persistent_session']:
+                cookies = await page.context.cookies()
+                # File writes run off the loop so other scrapes keep moving
+                await asyncio.to_thread(save_session_cookies, cookies, auth_config)
+            return True
+        
+        # One final comprehensive check
+        try:
+            # Check multiple indicators one more time
+            account_indicator = page.locator('#nav-link-accountList')
+            if await account_indicator.count() > 0:
+                account_text = await account_indicator.text_content()
+                if account_text and ('Hello' in account_text or 'Account' in account_text) and 'sign in' not in account_text.lower():
+                    logger.info("✅ Login successful (final verification)")
+                    if auth_config['persistent_session']:
+                        cookies = await page.context.cookies()
+                        await asyncio.to_thread(save_session_cookies, cookies, auth_config)
+                    return True
+        except:
+            pass
+
+        logger.warning("⚠️ Login may have failed - could not verify account status")
+        logger.info("💡 Tip: You can disable authentication in the settings to continue without login")
         return False
 
-    # ---------------- Helper: Human-like scrolling ----------------
-    async def human_scroll(page, max_scrolls=3):
-        """Perform human-like scrolling to load dynamic content and appear more natural"""
-        try:
-            # Get page height
-            page_height = await page.evaluate("document.body.scrollHeight")
-
-            for i in range(random.randint(1, max_scrolls)):
-                # Random scroll amount (300-800px)
-                scroll_amount = random.randint(300, 800)
-                current_scroll = await page.evaluate("window.pageYOffset")
-
-                # Sometimes use smooth scrolling, sometimes instant
-                if random.choice([True, False]):
-                    # Smooth scroll
-                    await page.evaluate(f"""
-                        window.scrollTo({{
-                            top: {current_scroll + scroll_amount},
-                            behavior: 'smooth'
-                        }});
-                    """)
-                    await human_delay(800, 1500)  # Wait for smooth scroll
-                else:
-                    # Instant scroll
-                    await page.evaluate(f"window.scrollTo(0, {current_scroll + scroll_amount})")
-                    await human_delay(300, 800)  # Shorter wait for instant scroll
+    except Exception as e:
+        logger.error(f"❌ Auto login failed: {str(e)}")
+        return False
 
-                # Random pause to simulate reading
-                if random.random() < 0.3:  # 30% chance
-                    await human_delay(1000, 3000)
 
-            # Sometimes scroll back up a bit (20% chance)
-            if random.random() < 0.2:
-                back_scroll = random.randint(100, 300)
-                current_scroll = await page.evaluate("window.pageYOffset")
-                await page.evaluate(f"window.scrollTo(0, {max(0, current_scroll - back_scroll)})")
-                await human_delay(500, 1000)
+# ---------------- Helper: Human-like delay ----------------
+async def human_delay(min_ms=1000, max_ms=3000):
+    await asyncio.sleep(task_rng().uniform(min_ms, max_ms) / 1000)
 
-            logger.info(f"🔄 Performed {max_scrolls} scroll actions to load dynamic content")
 
-        except Exception as e:
-            logger.warning(f"⚠️ Scrolling failed: {str(e)}")
-
-    # ---------------- Helper: Extract product reviews from multiple pages ----------------
-    async def extract_product_reviews(product_url, max_reviews=50, max_pages=3):
-        """Extract customer reviews from multiple pages - first tries product page reviews, then navigates to reviews page and extracts from up to 3 pages"""
-        browser = None
-        playwright = None
-        page = None
+# ---------------- Helper: Safe page navigation with timeout handling ----------------
+async def safe_navigate(page, url, timeout=60000, max_retries=2):
+    """Navigate to URL with retry logic and better error handling"""
+    for attempt in range(max_retries + 1):
         try:
-            browser, playwright, page = await get_browser(headless=False)
-            logger.info(f"📝 STARTING MULTI-PAGE REVIEW EXTRACTION")
-            logger.info(f"   🎯 Target: {product_url}")
-            logger.info(f"   📊 Max pages to scrape: {max_pages}")
-            logger.info(f"   📈 Max reviews per page: {max_reviews}")
-            # Use safe navigation with retry logic
-            if not await safe_navigate(page, product_url, timeout=60000):
-                logger.error(f"❌ Failed to navigate to product URL: {product_url}")
-                return {
-                    "url": product_url,
-                    "reviews": [],
-                    "success": False,
-                    "error": "Failed to load product page",
-                    "pages_scraped": 0
-                }
-            await human_delay(2000, 4000)
-
-            # Add human-like scrolling to load dynamic content
-            await human_scroll(page, max_scrolls=2)
-
-            # Helper function to extract reviews from soup
-            def extract_reviews_from_soup(soup, max_reviews=None):
-                reviews = []
-                review_containers = []
+            logger.info(f"🌐 Navigating to {url} (attempt {attempt + 1}/{max_retries + 1})")
+            await page.goto(url, timeout=timeout)
+            logger.info(f"✅ Successfully loaded {url}")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Navigation attempt {attempt + 1} failed: {str(e)}")
+            if attempt < max_retries:
+                await human_delay(2000, 4000)  # Wait before retry
+                continue
+            else:
+                logger.error(f"❌ All navigation attempts failed for {url}")
+                return False
+    return False
+
+
+# ---------------- Helper: Human-like scrolling ----------------
+# Run a whole scroll plan inside the page: each step scrolls, waits its pause, and the plan
+# stops once the target is loaded. Returns the steps taken, or -1 if the target was already there.
+SCROLL_PLAN_JS = """
+async ({steps, back, targetSelector, minCount}) => {
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const loaded = () => targetSelector !== null && document.querySelectorAll(targetSelector).length >= minCount;
+    const scrollBy = (delta, smooth) => {
+        const next = Math.max(0, Math.min(document.body.scrollHeight, window.pageYOffset + delta));
+        window.scrollTo({top: next, behavior: smooth ? 'smooth' : 'auto'});
+    };
+
+    if (loaded()) return -1;
+    let taken = 0;
+    for (const step of steps) {
+        scrollBy(step.amount, step.smooth);
+        await sleep(step.pauseMs);
+        taken++;
+        if (loaded()) break;
+    }
+    if (back) {
+        scrollBy(-back.amount, false);
+        await sleep(back.pauseMs);
+    }
+    return taken;
+}
+"""
+
+
+async def human_scroll(page, max_scrolls=3, target_selector=None, min_count=1):
+    """Perform human-like scrolling to load dynamic content and appear more natural
+
+    With target_selector, scrolling is skipped (or stopped early) as soon as
+    min_count matching elements are in the DOM.
+    """
+    try:
+        # Draw the whole scroll plan up front: 300-800px per step, sometimes smooth
+        # (with a longer settle wait), sometimes followed by a reading pause
+        rng = task_rng()
+        steps = []
+        for _ in range(rng.randint(1, max_scrolls)):
+            smooth = rng.random() < 0.5
+            pause_ms = rng.uniform(800, 1500) if smooth else rng.uniform(300, 800)
+            if rng.random() < 0.3:
+                pause_ms += rng.uniform(1000, 3000)
+            steps.append({"amount": rng.randint(300, 800), "smooth": smooth, "pauseMs": pause_ms})
+        # Sometimes scroll back up a bit (20% chance)
+        back = {"amount": rng.randint(100, 300), "pauseMs": rng.uniform(500, 1000)} if rng.random() < 0.2 else None
+
+        taken = await page.evaluate(SCROLL_PLAN_JS, {
+            "steps": steps,
+            "back": back,
+            "targetSelector": target_selector,
+            "minCount": min_count
+        })
+        if taken < 0:
+            logger.info(f"⏭️ Skipping scroll, {target_selector} already loaded")
+        else:
+            logger.info(f"🔄 Performed {taken} scroll actions to load dynamic content")
+
+    except Exception as e:
+        logger.warning(f"⚠️ Scrolling failed: {str(e)}")
+
+
+# ---------------- Helper: Wait for reviews to render ----------------
+async def wait_for_reviews(page, timeout=REVIEW_WAIT_TIMEOUT):
+    """Wait until a review container is in the DOM; False if none showed up in time"""
+    try:
+        await page.wait_for_selector(REVIEW_READY_SELECTOR, timeout=timeout)
+        logger.info("✅ Review elements found on page")
+        return True
+    except Exception as e:
+        # Continue anyway - some pages might have different selectors
+        logger.warning(f"⚠️ Review elements not found within timeout: {str(e)}")
+        return False
 
-                # Try multiple selectors for review containers
-                review_selectors = [
-                    'li[data-hook="review"]',
-                    '.review',
-                    '[data-hook="review"]',
-                    '.a-section.review'
-                ]
 
-                for selector in review_selectors:
-                    containers = soup.select(selector)
-                    if containers:
-                        logger.info(f"✅ Found {len(containers)} review containers with selector: {selector}")
-                        review_containers = containers
-                        break
-
-                if not review_containers:
-                    logger.warning("⚠️ No review containers found")
-                    return reviews
+# ---------------- Helper: Read reviews from the live page ----------------
+async def read_page_reviews(page, max_reviews=None):
+    """Extract every review on the page with a single page.evaluate round trip"""
+    found = await page.evaluate(
+        REVIEW_FIELD_TEXTS_JS,
+        [REVIEW_CONTAINER_SELECTORS, REVIEW_FIELD_PLAN, max_reviews]
+    )
+    if not found["reviews"]:
+        logger.warning("⚠️ No review containers found")
+        return []
+    logger.info(f"✅ Found {len(found['reviews'])} review containers with selector: {found['selector']}")
+
+    reviews = []
+    for review_id, (text_texts, rating_texts, name_texts, date_texts, helpful_texts) in found["reviews"]:
+        review_text = first_accepted(text_texts)
+        if not review_text:  # Only add reviews that have content
+            continue
+
+        # Extract number from "4.0 out of 5 stars"
+        rating_text = first_accepted(rating_texts, RATING_RE.search)
+        reviews.append({
+            "reviewer_name": first_accepted(name_texts),
+            "rating": RATING_RE.search(rating_text).group(1) if rating_text else "",
+            "date": first_accepted(date_texts),
+            "text": review_text,
+            "helpful_votes": first_accepted(helpful_texts),
+            "review_id": review_id
+        })
+    return reviews
+
+
+# ---------------- Helper: Drop reviews already collected ----------------
+def unseen_reviews(page_reviews, seen_ids):
+    """Reviews of a page not collected yet, or None if Amazon served an earlier page again
+
+    seen_ids is updated in place; reviews without an id are always kept.
+    """
+    page_ids = {review["review_id"] for review in page_reviews if review["review_id"]}
+    if page_ids and page_ids <= seen_ids:
+        return None
+    fresh = [review for review in page_reviews if review["review_id"] not in seen_ids]
+    seen_ids |= page_ids
+    return fresh
+
+
+# ---------------- Helper: Read one review page by URL ----------------
+def review_page_url(reviews_url, page_num):
+    """Reviews are paginated by query string, so any page can be loaded directly"""
+    return f"{reviews_url}?pageNumber={page_num}"
+
+
+async def read_review_page(context, reviews_url, page_num, slots):
+    """Load review page page_num of a product in its own tab and read it"""
+    async with slots:
+        page = await context.new_page()
+        try:
+            await page.goto(review_page_url(reviews_url, page_num), timeout=60000, wait_until="domcontentloaded")
+            await wait_for_reviews(page)
+            return await read_page_reviews(page)
+        finally:
+            await page.close()
+
+
+# ---------------- Helper: Extract product reviews (memoized) ----------------
+async def extract_product_reviews(product_url, max_reviews=50, max_pages=3, context=None):
+    """Cached front for scrape_product_reviews; concurrent calls for one product share a scrape"""
+    return await memoized(
+        REVIEWS_CACHE,
+        (canonical_product_url(product_url), max_reviews, max_pages),
+        lambda: scrape_product_reviews(product_url, max_reviews, max_pages, context),
+        # Zero reviews usually means a sign-in wall or bot check, not a product without reviews
+        cacheable=lambda result: result.get("success") and result.get("reviews")
+    )
+
+
+# ---------------- Helper: Scrape product reviews from multiple pages ----------------
+async def scrape_product_reviews(product_url, max_reviews=50, max_pages=3, context=None):
+    """Extract customer reviews from multiple pages - first tries product page reviews, then navigates to reviews page and extracts from up to 3 pages
+
+    When an open context is passed in, the scrape runs in a new page of it and
+    only that page is closed afterwards; otherwise a dedicated context is opened.
+    """
+    own_context = None
+    page = None
+    try:
+        if context is None:
+            own_context, page = await new_context()
+        else:
+            page = await context.new_page()
+        logger.info(f"📝 STARTING MULTI-PAGE REVIEW EXTRACTION")
+        logger.info(f"   🎯 Target: {product_url}")
+        logger.info(f"   📊 Max pages to scrape: {max_pages}")
+        logger.info(f"   📈 Max reviews per page: {max_reviews}")
+        # Use safe navigation with retry logic
+        if not await safe_navigate(page, product_url, timeout=60000):
+            logger.error(f"❌ Failed to navigate to product URL: {product_url}")
+            return {
+                "url": product_url,
+                "reviews": [],
+                "success": False,
+                "error": "Failed to load product page",
+                "pages_scraped": 0
+            }
+        await wait_for_reviews(page)
 
-                logger.info(f"🔍 Found {len(review_containers)} review containers")
+        # Add human-like scrolling to load dynamic content
+        if SCRAPE_STEALTH:
+            await human_scroll(page, max_scrolls=2, target_selector=REVIEW_READY_SELECTOR)
 
-                # Limit reviews if max_reviews is specified
-                containers_to_process = review_containers
-                if max_reviews is not None:
-                    containers_to_process = review_containers[:max_reviews]
+        # First, try to extract reviews directly from the product page
+        product_page_reviews = await read_page_reviews(page)
 
-                for i, review in enumerate(containers_to_process):
-                    try:
-                        # Extract review text
-                        review_text = ""
-                        text_selectors = [
-                            '[data-hook="review-body"]',
-                            '.review-text-content',
-                            '.a-expander-content',
-                            '[data-hook="review-collapsed"]'
-                        ]
-                        for selector in text_selectors:
-                            text_el = review.select_one(selector)
-                            if text_el:
-                                review_text = text_el.get_text(strip=True)
-                                break
-
-                        # Extract rating
-                        rating = ""
-                        rating_selectors = [
-                            '[data-hook="review-star-rating"] .a-icon-alt',
-                            '.a-icon-star .a-icon-alt',
-                            '[data-hook="cmps-review-star-rating"]'
-                        ]
-                        for selector in rating_selectors:
-                            rating_el = review.select_one(selector)
-                            if rating_el:
-                                rating_text = rating_el.get_text(strip=True)
-                                import re
-                                match = re.search(r"(\d+\.?\d*)", rating_text)
-                                if match:
-                                    rating = match.group(1)
-                                    break
-
-                        # Extract reviewer name
-                        reviewer_name = ""
-                        name_selectors = [
-                            '[data-hook="review-author"]',
-                            '.a-profile-name',
-                            '[data-hook="cmps-reviewer-name"]'
-                        ]
-                        for selector in name_selectors:
-                            name_el = review.select_one(selector)
-                            if name_el:
-                                reviewer_name = name_el.get_text(strip=True)
-                                break
-
-                        # Extract review date
-                        review_date = ""
-                        date_selectors = [
-                            '[data-hook="review-date"]',
-                            '.review-date',
-                            '[data-hook="cmps-review-date"]'
-                        ]
-                        for selector in date_selectors:
-                            date_el = review.select_one(selector)
-                            if date_el:
-                                review_date = date_el.get_text(strip=True)
-                                break
-
-                        # Extract helpful votes
-                        helpful_votes = ""
-                        helpful_selectors = [
-                            '[data-hook="helpful-vote-statement"]',
-                            '.helpful-votes',
-                            '[data-hook="cmps-helpful-vote-statement"]'
-                        ]
-                        for selector in helpful_selectors:
-                            helpful_el = review.select_one(selector)
-                            if helpful_el:
-                                helpful_votes = helpful_el.get_text(strip=True)
-                                break
-
-                        if review_text:  # Only add reviews that have content
-                            reviews.append({
-                                "reviewer_name": reviewer_name,
-                                "rating": rating,
-                                "date": review_date,
-                                "text": review_text,
-                                "helpful_votes": helpful_votes
-                            })
-
-                    except Exception as e:
-                        logger.warning(f"⚠️ Error extracting review {i+1}: {str(e)}")
-                        continue
-
-                return reviews
-
-            # First, try to extract reviews directly from the product page
-            soup = BeautifulSoup(await page.content(), "html.parser")
-            # Extract all available reviews from product page
-            product_page_reviews = extract_reviews_from_soup(soup)
-
-            # If max_pages is 1, we only want product page reviews
-            if max_pages == 1 and product_page_reviews:
-                result = {
-                    "url": product_url,
-                    "total_reviews_found": len(product_page_reviews),
-                    "reviews": product_page_reviews,
-                    "success": True,
-                    "source": "product_page",
-                    "pages_scraped": 1
-                }
-                logger.info(f"✅ Extracted {len(product_page_reviews)} reviews from product page (max_pages=1)")
-                return result
+        # If max_pages is 1, we only want product page reviews
+        if max_pages == 1 and product_page_reviews:
+            result = {
+                "url": product_url,
+                "total_reviews_found": len(product_page_reviews),
+                "reviews": product_page_reviews,
+                "success": True,
+                "source": "product_page",
+                "pages_scraped": 1
+            }
+            logger.info(f"✅ Extracted {len(product_page_reviews)} reviews from product page (max_pages=1)")
+            return result
+        
+        # For multi-page extraction (max_pages > 1), always navigate to dedicated reviews page
+        logger.info(f"🔄 Multi-page extraction requested ({max_pages} pages), navigating to dedicated reviews page...")
+        if product_page_reviews:
+            logger.info(f"📋 Found {len(product_page_reviews)} reviews on product page, but proceeding to reviews page for multi-page extraction")
+
+        # Navigate to dedicated reviews page for multi-page extraction
+        reviews_loaded = False
+        reviews_url = None
+
+        # Method 1: Skip clicking review link due to strict mode violations
+        # (Multiple elements with same ID cause Playwright strict mode errors)
+        logger.info("⏭️ Skipping review link click to avoid strict mode violations")
+
+        # Method 2: Always try direct navigation for multi-page extraction (more reliable)
+        if not reviews_loaded or max_pages > 1:
+            if max_pages > 1:
+                logger.info(f"🎯 Forcing navigation to reviews page for multi-page extraction (max_pages={max_pages})")
             
-            # For multi-page extraction (max_pages > 1), always navigate to dedicated reviews page
-            logger.info(f"🔄 Multi-page extraction requested ({max_pages} pages), navigating to dedicated reviews page...")
-            if product_page_reviews:
-                logger.info(f"📋 Found {len(product_page_reviews)} reviews on product page, but proceeding to reviews page for multi-page extraction")
-
-            # Navigate to dedicated reviews page for multi-page extraction
-            reviews_loaded = False
-
-            # Method 1: Skip clicking review link due to strict mode violations
-            # (Multiple elements with same ID cause Playwright strict mode errors)
-            logger.info("⏭️ Skipping review link click to avoid strict mode violations")
-
-            # Method 2: Always try direct navigation for multi-page extraction (more reliable)
-            if not reviews_loaded or max_pages > 1:
-                if max_pages > 1:
-                    logger.info(f"🎯 Forcing navigation to reviews page for multi-page extraction (max_pages={max_pages})")
-                
-                # Check if we're already on a reviews page
-                if "/product-reviews/" in product_url:
-                    logger.info("✅ Already on a reviews page, no need to navigate")
-                    reviews_loaded = True
-                else:
-                    try:
-                        # Extract product ID from URL
-                        import re
-                        product_id_match = re.search(r'/dp/([A-Z0-9]+)', product_url)
-                        if product_id_match:
-                            product_id = product_id_match.group(1)
-                            reviews_url = f"https://www.amazon.com/product-reviews/{product_id}"
-                            logger.info(f"🔄 Navigating directly to reviews page: {reviews_url}")
-
-                            await page.goto(reviews_url, timeout=60000)
-                            await page.wait_for_load_state("domcontentloaded")
-                            await human_delay(3000, 5000)  # Increased wait time
-
-                            # Wait for DOM to be ready (JavaScript loading reviews)
-                            await page.wait_for_load_state("domcontentloaded")
-                            await human_delay(2000, 3000)
-
-                            # Try to wait for review elements to appear with longer timeout
-                            try:
-                                await page.wait_for_selector('[data-hook="review"], .review, .a-section.review', timeout=SELECTOR_TIMEOUT)
-                                logger.info("✅ Review elements found on page")
-                            except Exception as e:
-                                logger.warning(f"⚠️ Review elements not found within timeout: {str(e)}")
-                                # Continue anyway - some pages might have different selectors
-
-                            await human_scroll(page, max_scrolls=3)  # More scrolling to trigger loading
-                            await human_delay(1000, 2000)
+            # Check if we're already on a reviews page
+            if "/product-reviews/" in product_url:
+                logger.info("✅ Already on a reviews page, no need to navigate")
+                reviews_url = product_url.split("?", 1)[0]
+                reviews_loaded = True
+            else:
+                try:
+                    # Extract product ID from URL
+                    product_id_match = ASIN_RE.search(product_url)
+                    if product_id_match:
+                        product_id = product_id_match.group(1)
+                        reviews_url = f"{AMAZON_BASE}/product-reviews/{product_id}"
+                        logger.info(f"🔄 Navigating directly to reviews page: {reviews_url}")
 
-                            reviews_loaded = True
-                            logger.info("✅ Navigated to reviews page directly")
-                        else:
-                            logger.warning("⚠️ Could not extract product ID for direct navigation")
+                        await page.goto(reviews_url, timeout=60000, wait_until="domcontentloaded")
 
-                    except Exception as e:
-                        logger.warning(f"⚠️ Direct navigation to reviews failed: {str(e)}")
+                        # Reviews pages are server-rendered: once a review is in, they all are
+                        await wait_for_reviews(page)
 
-            # Now extract reviews from multiple pages
-            all_reviews = []
-            pages_scraped = 0
+                        reviews_loaded = True
+                        logger.info("✅ Navigated to reviews page directly")
+                    else:
+                        logger.warning("⚠️ Could not extract product ID for direct navigation")
+
+                except Exception as e:
+                    logger.warning(f"⚠️ Direct navigation to reviews failed: {str(e)}")
+                    reviews_url = None
+
+        # Now extract reviews from multiple pages
+        all_reviews = []
+        seen_ids = set()
+        pages_scraped = 0
+
+        if reviews_url and max_pages > 1 and not SCRAPE_STEALTH:
+            # Pages 2..N load by URL in sibling tabs while page 1 is read here
+            logger.info(f"⚡ Loading review pages 2-{max_pages} concurrently")
+            slots = asyncio.Semaphore(REVIEW_PAGE_CONCURRENCY)
+            # Page 1 already waited for its reviews right after navigating
+            page_results = await asyncio.gather(
+                read_page_reviews(page),
+                *(read_review_page(page.context, reviews_url, page_num, slots)
+                  for page_num in range(2, max_pages + 1)),
+                return_exceptions=True
+            )
 
+            for page_num, page_reviews in enumerate(page_results, 1):
+                if isinstance(page_reviews, Exception):
+                    logger.error(f"❌ Error scraping page {page_num}: {str(page_reviews)}")
+                    break
+                if not page_reviews:
+                    # Past the last page Amazon serves an empty list
+                    logger.info(f"🔚 PAGE {page_num}: No reviews, stopping at page {page_num - 1}")
+                    break
+                page_reviews = unseen_reviews(page_reviews, seen_ids)
+                if page_reviews is None:
+                    logger.info(f"🔁 PAGE {page_num}: Repeats reviews already collected, stopping at page {page_num - 1}")
+                    break
+                all_reviews.extend(page_reviews)
+                pages_scraped += 1
+                logger.info(f"✅ PAGE {page_num} SUCCESS: Extracted {len(page_reviews)} reviews | Total so far: {len(all_reviews)}")
+        else:
             for page_num in range(1, max_pages + 1):
                 try:
                     logger.info(f"📖 SCRAPING PAGE {page_num}/{max_pages} | Current URL: {page.url}")
-                    
-                    # Wait for page to load completely - use domcontentloaded instead of networkidle
-                    await page.wait_for_load_state("domcontentloaded")
-                    await human_delay(2000, 3000)
-                    
-                    # Scroll to load dynamic content
-                    logger.info(f"🔄 Scrolling page {page_num} to load dynamic content...")
-                    await human_scroll(page, max_scrolls=2)
-                    await human_delay(1000, 2000)
-
-                    soup = BeautifulSoup(await page.content(), "html.parser")
+                
+                    # Wait for this page's reviews to render; page 1 already waited right after navigating
+                    if page_num > 1:
+                        await wait_for_reviews(page)
+
+                    # Scroll to load dynamic content; only the product page lazy-loads its reviews
+                    if SCRAPE_STEALTH and "/product-reviews/" not in page.url:
+                        logger.info(f"🔄 Scrolling page {page_num} to load dynamic content...")
+                        await human_scroll(page, max_scrolls=2, target_selector=REVIEW_READY_SELECTOR)
 
                     # Extract reviews from current page
                     logger.info(f"🔍 Extracting reviews from page {page_num}...")
-                    page_reviews = extract_reviews_from_soup(soup)
-                    
+                    page_reviews = await read_page_reviews(page)
+                    if page_reviews:
+                        page_reviews = unseen_reviews(page_reviews, seen_ids)
+                        if page_reviews is None:
+                            # Amazon re-serves the last page instead of ending; don't navigate on
+                            logger.info(f"🔁 PAGE {page_num}: Repeats reviews already collected, stopping")
+                            break
+
                     if page_reviews:
                         all_reviews.extend(page_reviews)
                         pages_scraped += 1
                         logger.info(f"✅ PAGE {page_num} SUCCESS: Extracted {len(page_reviews)} reviews | Total so far: {len(all_reviews)}")
                     else:
-                        logger.warning(f"⚠️ PAGE {page_num} NO REVIEWS: No reviews found on this page")
+                        # Past the last page Amazon serves an empty list
+                        logger.warning(f"⚠️ PAGE {page_num} NO REVIEWS: No reviews found on this page, stopping")
+                        break
 
-                    # If this is not the last page, try to navigate to next page
+                    # If this is not the last page, load the next one by URL
                     if page_num < max_pages:
-                        logger.info(f"🚀 NAVIGATING TO PAGE {page_num + 1}...")
-                        # Look for next page button
-                        next_page_found = False
-                        next_selectors = [
-                            'li.a-last a',
-                            'a[aria-label="Next page"]',
-                            'li.a-last:not(.a-disabled) a',
-                            '.a-pagination .a-last a',
-                            'text=Next',
-                            '[data-hook="pagination-bar"] .a-last a'
-                        ]
-
-                        for selector in next_selectors:
-                            try:
-                                next_button = page.locator(selector)
-                                if await next_button.count() > 0:
-                                    # Check if button is enabled (not disabled)
-                                    button_class = await next_button.first.get_attribute('class') or ""
-                                    parent_class = await next_button.first.locator('..').get_attribute('class') or ""
-                                    
-                                    if 'a-disabled' not in button_class and 'a-disabled' not in parent_class:
-                                        logger.info(f"🔗 PAGE {page_num}: Found next page button with selector: {selector}")
-                                        await next_button.first.click()
-                                        logger.info(f"⏳ PAGE {page_num}: Clicked next button, waiting for page {page_num + 1} to load...")
-                                        await human_delay(3000, 5000)  # Wait for page to load
-                                        logger.info(f"✅ PAGE {page_num}: Successfully navigated to page {page_num + 1}")
-                                        next_page_found = True
-                                        break
-                            except Exception as e:
-                                logger.warning(f"⚠️ PAGE {page_num}: Error trying next page selector {selector}: {str(e)}")
-                                continue
-
-                        if not next_page_found:
-                            logger.info(f"🔚 PAGE {page_num}: No more pages available after page {page_num} (reached end or no next button)")
+                        if not reviews_url:
+                            logger.info(f"🔚 PAGE {page_num}: Not on a reviews page, nothing to paginate")
                             break
+                        logger.info(f"🚀 NAVIGATING TO PAGE {page_num + 1}...")
+                        # Jitter stays on the page turn itself, the anti-bot surface
+                        if SCRAPE_STEALTH:
+                            await human_delay(1000, 2000)
+                        await page.goto(review_page_url(reviews_url, page_num + 1), timeout=60000, wait_until="domcontentloaded")
 
                 except Exception as e:
                     logger.error(f"❌ Error scraping page {page_num}: {str(e)}")
                     break
 
-            result = {
-                "url": product_url,
-                "total_reviews_found": len(all_reviews),
-                "reviews": all_reviews,
-                "success": True,
-                "source": "reviews_page",
-                "pages_scraped": pages_scraped
-            }
-
-            logger.info(f"🎯 FINAL SUMMARY: Extracted {len(all_reviews)} total reviews from {pages_scraped}/{max_pages} pages")
-            return result
+        result = {
+            "url": product_url,
+            "total_reviews_found": len(all_reviews),
+            "reviews": all_reviews,
+            "success": True,
+            "source": "reviews_page",
+            "pages_scraped": pages_scraped
+        }
 
+        logger.info(f"🎯 FINAL SUMMARY: Extracted {len(all_reviews)} total reviews from {pages_scraped}/{max_pages} pages")
+        return result
+
+    except Exception as e:
+        logger.error(f"❌ Error getting product reviews for {product_url}: {str(e)}")
+        return {
+            "url": product_url,
+            "reviews": [],
+            "success": False,
+            "error": str(e),
+            "pages_scraped": 0
+        }
+    finally:
+        # Only close what we opened; the browser (and a caller's context) stays up
+        try:
+            if own_context:
+                await own_context.close()
+            elif page:
+                await page.close()
         except Exception as e:
-            logger.error(f"❌ Error getting product reviews for {product_url}: {str(e)}")
-            return {
-                "url": product_url,
-                "reviews": [],
-                "success": False,
-                "error": str(e),
-                "pages_scraped": 0
-            }
-        finally:
-            # Safely close browser and playwright
+            logger.warning(f"⚠️ Error closing browser context: {str(e)}")
+
+
+# ---------------- Helper: Pick the first usable text of a selector chain ----------------
+def first_accepted(texts, accept=None):
+    """Return the first matched text, in selector order, that passes accept()"""
+    for text in texts:
+        if text is not None and (accept is None or accept(text)):
+            return text
+    return ""
+
+
+# ---------------- Helper: Build product details from matched selector texts ----------------
+def product_details_from_texts(product_url, title_texts, price_texts, rating_texts, review_texts):
+    """Pick each field from its selector chain's matched texts"""
+    title = first_accepted(title_texts)
+    price = first_accepted(price_texts, lambda text: "$" in text)
+
+    # Extract number from "4.5 out of 5 stars"
+    rating_text = first_accepted(rating_texts, RATING_RE.search)
+    rating = RATING_RE.search(rating_text).group(1) if rating_text else ""
+
+    # Look for patterns like "1,234 ratings" or "1,234 customer reviews"
+    review_text = first_accepted(review_texts, REVIEW_COUNT_RE.search)
+    review_count = REVIEW_COUNT_RE.search(review_text).group(1) if review_text else ""
+
+    logger.info(f"✅ Extracted details: {title[:50]}... | Price: {price} | Rating: {rating} | Reviews: {review_count}")
+    return {
+        "url": product_url,
+        "title": title,
+        "price": price,
+        "rating": rating,
+        "review_count": review_count,
+        "success": True
+    }
+
+
+# ---------------- Helper: Fetch product details without a browser ----------------
+async def fetch_product_details_http(product_url, max_retries=2):
+    """Fetch and parse a product page over plain HTTP
+
+    Returns None when Amazon answers with a bot wall (503 / no title) so the
+    caller can fall back to rendering the page.
+    """
+    session = await get_http_session()
+    headers = {
+        "User-Agent": fingerprint_rng.choice(USER_AGENTS),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9"
+    }
+    for attempt in range(max_retries + 1):
+        try:
+            async with session.get(product_url, headers=headers) as response:
+                if response.status == 503:
+                    logger.info(f"🧱 HTTP fetch hit a bot wall for {product_url}")
+                    return None
+                response.raise_for_status()
+                html = await response.text()
+            break
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"⚠️ HTTP fetch attempt {attempt + 1} failed: {str(e)}")
+            if attempt == max_retries:
+                return None
+            await asyncio.sleep(0.5 * 2 ** attempt)  # Exponential backoff
+
+    # Same selector chains as the browser path, with textContent.trim() semantics
+    tree = LexborHTMLParser(html)
+    title_texts, price_texts, rating_texts, review_texts = (
+        [node.text().strip() if (node := tree.css_first(selector)) else None for selector in selectors]
+        for selectors in (PRODUCT_TITLE_SELECTORS, PRODUCT_PRICE_SELECTORS,
+                          PRODUCT_RATING_SELECTORS, PRODUCT_REVIEW_COUNT_SELECTORS)
+    )
+    if not first_accepted(title_texts):
+        logger.info(f"🧱 HTTP fetch returned no product title for {product_url}")
+        return None
+    return product_details_from_texts(product_url, title_texts, price_texts, rating_texts, review_texts)
+
+
+# ---------------- Helper: Extract product details (memoized) ----------------
+async def extract_product_details(product_url, context=None):
+    """Cached front for scrape_product_details; concurrent calls for one product share a scrape"""
+    return await memoized(
+        DETAILS_CACHE,
+        canonical_product_url(product_url),
+        lambda: scrape_product_details(product_url, context),
+        # A CAPTCHA or dog page still "succeeds" with every field empty
+        cacheable=lambda result: result.get("success") and result.get("title")
+    )
+
+
+# ---------------- Helper: Scrape product details from page ----------------
+async def scrape_product_details(product_url, context=None):
+    """Extract product details from a single product page
+
+    The page is first fetched without a browser and only rendered if that
+    fails, in a new page of the given context or in a dedicated context.
+    """
+    if HTTP_FAST_PATH:
+        try:
+            details = await fetch_product_details_http(product_url)
+            if details:
+                return details
+        except Exception as e:
+            logger.warning(f"⚠️ HTTP fast path failed for {product_url}: {str(e)}")
+        logger.info(f"↩️ Falling back to browser for {product_url}")
+
+    own_context = None
+    page = None
+    try:
+        if context is not None:
+            page = await context.new_page()
+        else:
+            own_context, page = await new_context()
+        if not SCRAPE_STEALTH:
+            await page.route("**/*", block_non_document_resources)
+        logger.info(f"📦 Getting details for: {product_url}")
+        await page.goto(product_url, timeout=30000, wait_until="domcontentloaded")
+
+        # Title, price and rating are server-rendered; only dawdle in stealth mode
+        if SCRAPE_STEALTH:
+            await human_delay(2000, 4000)
+            await human_scroll(page, max_scrolls=2, target_selector="#productTitle")
+
+        # Resolve every field's selector chain against the live DOM in one round trip
+        field_texts = await page.evaluate(
+            FIRST_MATCH_TEXTS_JS,
+            [PRODUCT_TITLE_SELECTORS, PRODUCT_PRICE_SELECTORS,
+             PRODUCT_RATING_SELECTORS, PRODUCT_REVIEW_COUNT_SELECTORS]
+        )
+        return product_details_from_texts(product_url, *field_texts)
+
+    except Exception as e:
+        logger.error(f"❌ Error getting product details for {product_url}: {str(e)}")
+        return {
+            "url": product_url,
+            "title": "",
+            "price": "",
+            "rating": "",
+            "review_count": "",
+            "success": False,
+            "error": str(e)
+        }
+    finally:
+        # Only close what we opened; a caller's context stays up
+        if own_context:
+            await own_context.close()
+        elif page:
+            await page.close()
+
+
+# ---------------- Helper: Open a fresh context on the shared browser ----------------
+async def new_context(auto_login=True):
+    ua = fingerprint_rng.choice(USER_AGENTS)
+    viewport = {
+        "width": fingerprint_rng.randint(1280, 1920),
+        "height": fingerprint_rng.randint(720, 1080),
+    }
+
+    logger.info(f"🌐 Using UA: {ua[:60]}..., viewport={viewport}")
+
+    browser = await playwright_pool.get_browser()
+    context = await browser.new_context(
+        storage_state=load_storage_state(),
+        user_agent=ua,
+        locale="en-US",
+        timezone_id="America/New_York",
+        viewport=viewport,
+        ignore_https_errors=True,
+        extra_http_headers={
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5",
+            "Accept-Encoding": "gzip, deflate, br",
+            "DNT": "1",
+            "Connection": "keep-alive",
+            "Upgrade-Insecure-Requests": "1",
+            "Sec-Fetch-Dest": "document",
+            "Sec-Fetch-Mode": "navigate",
+            "Sec-Fetch-Site": "none",
+            "Cache-Control": "max-age=0"
+        }
+    )
+    # Callers only take ownership once this returns, so close the context on any failure
+    # or cancellation (e.g. a run_async timeout during login) instead of leaking it
+    try:
+        page = await setup_context(context, auto_login)
+    except BaseException:
+        await context.close()
+        raise
+    return context, page
+
+
+# ---------------- Helper: Configure a new context and restore the login ----------------
+async def setup_context(context, auto_login):
+    """Apply timeouts, routing, stealth and session cookies, log in if needed; returns the first page"""
+    # Set default timeouts for all operations
+    context.set_default_timeout(DEFAULT_TIMEOUT)  # 60 seconds for all operations
+    context.set_default_navigation_timeout(NAVIGATION_TIMEOUT)  # 60 seconds for navigation
+
+    # Only the DOM is scraped, so don't download images, fonts, media or CSS
+    await context.route("**/*", block_heavy_resources)
+
+    # Stealth overrides run in every page of the context before the site's own scripts
+    await context.add_init_script(STEALTH_JS)
+
+    # Load session cookies: the recently validated ones in memory, else the saved file.
+    # Freshness is read once, so the cookies added and the early return below agree.
+    auth_config = load_auth_config()
+    session_cookies = login_session.cookies if login_session.is_fresh() else None
+    cookies_loaded = False
+    if auth_config['enabled'] and (session_cookies or auth_config['persistent_session']):
+        if session_cookies:
+            saved_cookies = session_cookies
+        else:
+            saved_cookies = await asyncio.to_thread(load_session_cookies, auth_config)
+        if saved_cookies:
             try:
-                if browser:
-                    await browser.close()
-                if playwright:
-                    await playwright.stop()
+                await context.add_cookies(saved_cookies)
+                logger.info("✅ Restored session cookies")
+                cookies_loaded = True
             except Exception as e:
-                logger.warning(f"⚠️ Error closing browser/playwright: {str(e)}")
+                logger.warning(f"⚠️ Error restoring cookies: {str(e)}")
+
+    page = await context.new_page()
 
-    # ---------------- Helper: Extract product details from page ----------------
-    async def extract_product_details(product_url):
-        """Extract product details from a single product page"""
-        browser, playwright, page = await get_browser(headless=False)
+    # Perform auto login if enabled and requested
+    if auto_login and auth_config['enabled']:
+        if not auth_config['credentials']['email'] or not auth_config['credentials']['password']:
+            # auto_login_amazon would give up anyway; skip the homepage visit
+            logger.warning("⚠️ Auto auth enabled but credentials not set")
+            return page
+
+        if session_cookies and cookies_loaded:
+            logger.info("⚡ Reusing recently validated session cookies")
+            return page
+        if login_session.recently_failed():
+            logger.info("🔓 Recent login attempt failed, continuing without authentication")
+            return page
+
+        # One context at a time validates or logs in; the others reuse its result
+        async with login_session.lock():
+            if login_session.is_fresh():
+                await context.add_cookies(login_session.cookies)
+                logger.info("⚡ Session validated by a concurrent request, reusing its cookies")
+                return page
+            if login_session.recently_failed():
+                logger.info("🔓 Login failed for a concurrent request, continuing without authentication")
+                return page
+            # Load CSS while validating/logging in, so hidden decoy fields stay hidden
+            await context.unroute("**/*", block_heavy_resources)
+            await context.route("**/*", block_login_resources)
+            try:
+                await validate_or_login(context, page, cookies_loaded)
+            except Exception:
+                login_session.fail()
+                raise
+            # Back to DOM-only loading for the scrape itself
+            await context.unroute("**/*", block_login_resources)
+            await context.route("**/*", block_heavy_resources)
+
+    return page
+
+
+# ---------------- Helper: Validate restored cookies or log in ----------------
+async def validate_or_login(context, page, cookies_loaded):
+    """Check restored cookies on the homepage, falling back to a full auto login"""
+    # If we have cookies, do an ultra-quick validation first
+    if cookies_loaded:
+        logger.info("⚡ Ultra-fast session validation with restored cookies...")
+        await page.goto(AMAZON_BASE, timeout=10000)  # Even faster timeout
+        # Skip wait_for_load_state for maximum speed
+        if SCRAPE_STEALTH:
+            await human_delay(200, 300)  # Ultra-minimal delay
+        
+        # Quick check if already logged in
         try:
-            logger.info(f"📦 Getting details for: {product_url}")
-            await page.goto(product_url, timeout=60000)
-            await page.wait_for_load_state("domcontentloaded")
-            await human_delay(2000, 4000)
+            # Use immediate check without waiting
+            account_indicator = page.locator('#nav-link-accountList')
+            if await account_indicator.count() > 0:
+                account_text = await account_indicator.text_content()
+                if account_text and 'Hello' in account_text and 'sign in' not in account_text.lower():
+                    logger.info("🚀 Lightning authentication: Already logged in with saved session!")
+                    await login_session.remember(context)
+                    return
+        except:
+            pass
+        
+        logger.info("⚠️ Saved session invalid, proceeding with fresh login...")
+    
+    # Attempt auto login (it opens the homepage itself and pauses there)
+    login_success = await auto_login_amazon(page)
+    if login_success:
+        logger.info("🎉 Auto authentication completed successfully")
+        await login_session.remember(context)
+    else:
+        logger.info("🔓 Continuing without authentication")
+        login_session.fail()
+
+
+# ---------------- Helper: Read top search results from the live page ----------------
+async def read_search_results(page, limit):
+    """Read title and URL of the first `limit` search results from the live DOM in one evaluate"""
+    results = await page.evaluate(
+        SERP_RESULTS_JS,
+        [SERP_RESULT_SELECTOR, SERP_TITLE_SELECTORS, SERP_LINK_SELECTORS, limit]
+    )
+    logger.info(f"🔍 Found {len(results)} product containers")
+
+    products = []
+    for i, result in enumerate(results):
+        if result is None:
+            logger.warning(f"⚠️ Container {i+1}: Missing title or link")
+            continue
+        products.append(basic_product(i, *result))
+
+    return products
+
+
+# ---------------- Helper: Basic product entry from a search result ----------------
+def basic_product(index, title_text, href):
+    """Title/URL dict for one search result, with the URL made absolute"""
+    product_url = href or ""
+    if product_url.startswith("/"):
+        product_url = AMAZON_BASE + product_url
+    logger.info(f"✅ Found product {index+1}: {title_text[:50]}...")
+    return {
+        "title": title_text,
+        "url": product_url
+    }
+
+
+# ---------------- Helper: Raw HTML of the search page ----------------
+async def search_page_html(page, response):
+    """Body of the SERP document response, falling back to serializing the live DOM"""
+    if response is not None:
+        try:
+            return await response.text()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read search response body: {str(e)}")
+    return await page.content()
 
-            # Add human-like scrolling to load dynamic content
-            await human_scroll(page, max_scrolls=2)
 
-            soup = BeautifulSoup(await page.content(), "html.parser")
+# ---------------- Helper: First match of a selector chain ----------------
+def first_css_match(node, selectors):
+    """First element matched by the selectors, tried in order"""
+    for selector in selectors:
+        el = node.css_first(selector)
+        if el is not None:
+            return el
+    return None
 
-            # Extract title
-            title = ""
-            title_selectors = [
-                "#productTitle",
-                "#title",
-                ".a-size-large.product-title-word-break",
-                "h1.a-size-large"
-            ]
-            for selector in title_selectors:
-                title_el = soup.select_one(selector)
-                if title_el:
-                    title = title_el.get_text(strip=True)
-                    break
 
-            # Extract price
-            price = ""
-            price_selectors = [
-                ".a-price .a-offscreen",
-                "#priceblock_ourprice",
-                "#priceblock_dealprice",
-                "#priceblock_saleprice",
-                ".a-price-whole",
-                ".a-color-price",
-                "#corePrice_feature_div .a-price .a-offscreen",
-                "#corePriceDisplay_desktop_feature_div .a-price-whole",
-                "#corePriceDisplay_desktop_feature_div .a-price-fraction",
-                ".a-price .a-offscreen:first-child",
-                "#snsPrice .a-price .a-offscreen",
-                ".apexPriceToPay .a-offscreen"
-            ]
-            for selector in price_selectors:
-                price_el = soup.select_one(selector)
-                if price_el:
-                    price_text = price_el.get_text(strip=True)
-                    # Clean up price text
-                    if price_text and ("$" in price_text or "CDN$" in price_text):
-                        price = price_text
-                        break
+# ---------------- Helper: Parse top search results from HTML ----------------
+def parse_search_results(html, limit):
+    """Fallback for read_search_results when results use an older markup"""
+    tree = LexborHTMLParser(html)
+    # First container selector with any match; a union query would repeat nodes matching several
+    product_containers = next((found for selector in SERP_CONTAINER_SELECTORS if (found := tree.css(selector))), [])
 
-            # Extract rating
-            rating = ""
-            rating_selectors = [
-                ".a-icon-star-small .a-icon-alt",
-                ".a-icon-star .a-icon-alt",
-                "#acrPopover .a-icon-alt",
-                ".review-rating",
-                "#averageCustomerReviews .a-icon-alt",
-                ".a-declarative[data-action='acrStarsLink'] .a-icon-alt",
-                "#acrPopover [data-cy='reviews-ratings-date']"
-            ]
-            for selector in rating_selectors:
-                rating_el = soup.select_one(selector)
-                if rating_el:
-                    rating_text = rating_el.get_text(strip=True)
-                    # Extract number from "4.5 out of 5 stars"
-                    import re
-                    match = re.search(r"(\d+\.?\d*)", rating_text)
-                    if match:
-                        rating = match.group(1)
-                        break
+    logger.info(f"🔍 Found {len(product_containers)} product containers")
 
-            # Extract review count
-            review_count = ""
-            review_selectors = [
-                "#acrCustomerReviewText",
-                ".a-size-base",
-                "a[href*='customerReviews']",
-                "#acrCustomerReviewLink",
-                "[data-cy='reviews-ratings-count']",
-                ".a-link-emphasis"
-            ]
-            for selector in review_selectors:
-                review_el = soup.select_one(selector)
-                if review_el:
-                    review_text = review_el.get_text(strip=True)
-                    # Look for patterns like "1,234 ratings" or "1,234 customer reviews"
-                    import re
-                    match = re.search(r"([\d,]+)", review_text)
-                    if match:
-                        review_count = match.group(1)
-                        break
+    products = []
+    for i, container in enumerate(product_containers[:limit]):
+        # Serializing the container is O(subtree); only pay for it when debugging markup
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Processing container {i+1}: {container.html[:200]}...")
 
-            result = {
-                "url": product_url,
-                "title": title,
-                "price": price,
-                "rating": rating,
-                "review_count": review_count,
-                "success": True
-            }
+        # Try multiple selectors for title and link
+        title_el = first_css_match(container, SERP_TITLE_SELECTORS)
+        link_el = first_css_match(container, SERP_LINK_SELECTORS)
 
-            logger.info(f"✅ Extracted details: {title[:50]}... | Price: {price} | Rating: {rating} | Reviews: {review_count}")
-            return result
+        if not (title_el and link_el):
+            logger.warning(f"⚠️ Container {i+1}: Missing title or link")
+            continue
 
-        except Exception as e:
-            logger.error(f"❌ Error getting product details for {product_url}: {str(e)}")
-            return {
-                "url": product_url,
-                "title": "",
-                "price": "",
-                "rating": "",
-                "review_count": "",
-                "success": False,
-                "error": str(e)
-            }
-        finally:
-            await browser.close()
-            await playwright.stop()
-
-    # ---------------- Helper: Start browser with rotation and auto auth ----------------
-    async def get_browser(headless=False, auto_login=True):  # Changed to non-headless for testing
-        ua = random.choice(USER_AGENTS)
-        viewport = {
-            "width": random.randint(1280, 1920),
-            "height": random.randint(720, 1080),
-        }
+        products.append(basic_product(i, title_el.text(strip=True), link_el.attributes.get("href")))
 
-        logger.info(f"🌐 Using UA: {ua[:60]}..., viewport={viewport}")
-
-        playwright = await async_playwright().start()
-        browser = await playwright.chromium.launch(
-            headless=headless,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--disable-dev-shm-usage",
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-web-security",
-                "--disable-extensions",
-                "--disable-plugins",
-                "--disable-background-timer-throttling",
-                "--disable-backgrounding-occluded-windows",
-                "--disable-renderer-backgrounding",
-                "--disable-features=VizDisplayCompositor",
-                "--disable-ipc-flooding-protection",
-                "--disable-hang-monitor",
-                "--disable-prompt-on-repost",
-                "--disable-sync",
-                "--disable-translate",
-                "--disable-logging",
-                "--disable-permissions-api",
-                "--disable-notifications",
-                "--disable-geolocation",
-                "--disable-speech-api",
-                "--disable-file-system",
-                "--disable-presentation-api",
-                "--disable-remote-fonts",
-                "--disable-client-side-phishing-detection",
-                "--disable-component-extensions-with-background-pages",
-                "--disable-default-apps",
-                "--disable-domain-reliability",
-                "--disable-features=TranslateUI",
-                "--hide-scrollbars",
-                "--mute-audio",
-                "--no-first-run",
-                "--no-default-browser-check",
-                "--no-pings",
-                "--no-zygote",
-                "--use-mock-keychain",
-                "--user-agent=" + ua,
-            ]
-        )
-        
-        context = await browser.new_context(
-            user_agent=ua,
-            locale="en-US",
-            timezone_id="America/New_York",
-            viewport=viewport,
-            ignore_https_errors=True,
-            extra_http_headers={
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
-                "Accept-Encoding": "gzip, deflate, br",
-                "DNT": "1",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "none",
-                "Cache-Control": "max-age=0"
-            }
-        )
-        
-        # Set default timeouts for all operations
-        context.set_default_timeout(DEFAULT_TIMEOUT)  # 60 seconds for all operations
-        context.set_default_navigation_timeout(NAVIGATION_TIMEOUT)  # 60 seconds for navigation
+    return products
 
-        # Load saved session cookies if available
-        auth_config = load_auth_config()
-        cookies_loaded = False
-        if auth_config['enabled'] and auth_config['persistent_session']:
-            saved_cookies = load_session_cookies()
-            if saved_cookies:
-                try:
-                    await context.add_cookies(saved_cookies)
-                    logger.info("✅ Restored session cookies")
-                    cookies_loaded = True
-                except Exception as e:
-                    logger.warning(f"⚠️ Error restoring cookies: {str(e)}")
 
-        # Add more stealth measures
-        page = await context.new_page()
-        await page.evaluate("""
-            // Remove webdriver property
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-            });
-            
-            // Override the plugins property to use a custom getter
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5],
-            });
-            
-            // Override the languages property to use a custom getter
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en'],
-            });
-            
-            // Override the permissions property to use a custom getter
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Notification.permission }) :
-                    originalQuery(parameters)
-            );
-            
-            // Mock chrome object
-            window.chrome = {
-                runtime: {},
-                loadTimes: function() {},
-                csi: function() {},
-                app: {}
-            };
-            
-            // Mock webkit object
-            window.webkit = {
-                messageHandlers: {}
-            };
-        """)
-
-        # Perform auto login if enabled and requested
-        if auto_login and auth_config['enabled']:
-            # If we have cookies, do an ultra-quick validation first
-            if cookies_loaded:
-                logger.info("⚡ Ultra-fast session validation with restored cookies...")
-                await page.goto("https://www.amazon.com", timeout=10000)  # Even faster timeout
-                # Skip wait_for_load_state for maximum speed
-                await human_delay(200, 300)  # Ultra-minimal delay
-                
-                # Quick check if already logged in
-                try:
-                    # Use immediate check without waiting
-                    account_indicator = page.locator('#nav-link-accountList')
-                    if await account_indicator.count() > 0:
-                        account_text = await account_indicator.text_content()
-                        if account_text and 'Hello' in account_text and 'sign in' not in account_text.lower():
-                            logger.info("🚀 Lightning authentication: Already logged in with saved session!")
-                            return browser, playwright, page
-                except:
-                    pass
-                
-                logger.info("⚠️ Saved session invalid, proceeding with fresh login...")
-            
-            # Navigate to Amazon first to establish domain context with faster timeout
-            await page.goto("https://www.amazon.com", timeout=15000)  # Reduced from 30s to 15s
-            await page.wait_for_load_state("domcontentloaded")
-            await human_delay(500, 800)  # Reduced from 1-2s to 0.5-0.8s
-            
-            # Attempt auto login
-            login_success = await auto_login_amazon(page)
-            if login_success:
-                logger.info("🎉 Auto authentication completed successfully")
-            else:
-                logger.info("🔓 Continuing without authentication")
+# ---------------- Helper: Search Amazon and read the top results ----------------
+async def fetch_basic_products(page, keyword, limit):
+    """Load the search page for keyword and return title/URL of the first `limit` results.
+
+    Returns None when no results render in time.
+    """
+    # Search results are server-rendered, so the SERP tab needs only the document
+    if not SCRAPE_STEALTH:
+        await page.route("**/*", block_non_document_resources)
+
+    search_url = SEARCH_URL_TMPL.format(quote_plus(keyword))
+    logger.info(f"🔍 Searching for: {keyword}")
+    search_response = await page.goto(search_url, timeout=30000, wait_until="domcontentloaded")
+    if SCRAPE_STEALTH:
+        await human_delay(2000, 4000)
 
-        return browser, playwright, page
+        # Add scrolling to load more search results
+        await human_scroll(page, max_scrolls=1)
 
+    try:
+        await page.wait_for_selector(SERP_RESULT_SELECTOR, timeout=SERP_WAIT_TIMEOUT)
+    except Exception:
+        logger.error("❌ No search results loaded")
+        return None
 
+    products = await read_search_results(page, limit)
+    if not products:
+        logger.info("↩️ No live search results matched, falling back to HTML parse")
+        products = parse_search_results(await search_page_html(page, search_response), limit)
+    if products:
+        await save_storage_state(page.context)
+    return products
+
+
+def create_app() -> Flask:
+    global playwright_pool, background_loop
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+
+    if background_loop is None:
+        background_loop = start_background_loop()
+    app.loop = background_loop
+
+    if playwright_pool is None:
+        playwright_pool = PlaywrightPool()
+        atexit.register(playwright_pool.shutdown)
+        atexit.register(lambda: run_async(close_http_session()))
+        # `python app.py` runs with the reloader: the watcher process re-runs this module in a
+        # child (WERKZEUG_RUN_MAIN=true) and never serves requests itself, so only the child warms up
+        reloader_parent = __name__ == "__main__" and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+        if BROWSER_WARMUP and not reloader_parent:
+            playwright_pool.warm_up(background_loop)
+    app.playwright_pool = playwright_pool
+
+    if EXPORTS_TO_DISK:
+        os.makedirs(EXPORTS_DIR, exist_ok=True)
+    os.makedirs(EXPORTS_TMP_DIR, exist_ok=True)
+
+    @app.errorhandler(concurrent.futures.TimeoutError)
+    def scrape_timed_out(e):
+        return jsonify({"error": f"Request timed out after {REQUEST_TIMEOUT}s", "success": False}), 504
 
     # ---------------- Route: Get product details ----------------
     @app.route("/product-details")
@@ -1262,133 +2292,7 @@ def create_app() -> Flask:
         if not ("amazon.com" in product_url and ("/dp/" in product_url or "/gp/product/" in product_url or "/product-reviews/" in product_url)):
             return jsonify({"error": "Invalid Amazon product URL", "success": False}), 400
 
-        async def run():
-            browser, playwright, page = await get_browser(headless=False)
-            try:
-                logger.info(f"📦 Getting details for: {product_url}")
-                await page.goto(product_url, timeout=60000)
-                await page.wait_for_load_state("domcontentloaded")
-                await human_delay(2000, 4000)
-
-                # Add human-like scrolling to load dynamic content
-                await human_scroll(page, max_scrolls=2)
-
-                soup = BeautifulSoup(await page.content(), "html.parser")
-
-                # Debug: Log some HTML content to identify selectors
-                logger.info(f"🔍 Page title: {soup.title.get_text() if soup.title else 'No title'}")
-                logger.info(f"🔍 First few price-related elements: {len(soup.select('.a-price'))}")
-                logger.info(f"🔍 First few rating elements: {len(soup.select('.a-icon-star'))}")
-                logger.info(f"🔍 Sample HTML around price: {str(soup.select_one('.a-price'))[:200] if soup.select_one('.a-price') else 'No .a-price found'}")
-
-                # Extract title
-                title = ""
-                title_selectors = [
-                    "#productTitle",
-                    "#title",
-                    ".a-size-large.product-title-word-break",
-                    "h1.a-size-large"
-                ]
-                for selector in title_selectors:
-                    title_el = soup.select_one(selector)
-                    if title_el:
-                        title = title_el.get_text(strip=True)
-                        break
-
-                # Extract price
-                price = ""
-                price_selectors = [
-                    ".a-price .a-offscreen",
-                    "#priceblock_ourprice",
-                    "#priceblock_dealprice",
-                    "#priceblock_saleprice",
-                    ".a-price-whole",
-                    ".a-color-price",
-                    "#corePrice_feature_div .a-price .a-offscreen",
-                    "#corePriceDisplay_desktop_feature_div .a-price-whole",
-                    "#corePriceDisplay_desktop_feature_div .a-price-fraction",
-                    ".a-price .a-offscreen:first-child",
-                    "#snsPrice .a-price .a-offscreen",
-                    ".apexPriceToPay .a-offscreen"
-                ]
-                for selector in price_selectors:
-                    price_el = soup.select_one(selector)
-                    if price_el:
-                        price_text = price_el.get_text(strip=True)
-                        # Clean up price text
-                        if price_text and ("$" in price_text or "CDN$" in price_text):
-                            price = price_text
-                            break
-
-                # Extract rating
-                rating = ""
-                rating_selectors = [
-                    ".a-icon-star-small .a-icon-alt",
-                    ".a-icon-star .a-icon-alt",
-                    "#acrPopover .a-icon-alt",
-                    ".review-rating",
-                    "#averageCustomerReviews .a-icon-alt",
-                    ".a-declarative[data-action='acrStarsLink'] .a-icon-alt",
-                    "#acrPopover [data-cy='reviews-ratings-date']"
-                ]
-                for selector in rating_selectors:
-                    rating_el = soup.select_one(selector)
-                    if rating_el:
-                        rating_text = rating_el.get_text(strip=True)
-                        # Extract number from "4.5 out of 5 stars"
-                        import re
-                        match = re.search(r"(\d+\.?\d*)", rating_text)
-                        if match:
-                            rating = match.group(1)
-                            break
-
-                # Extract review count
-                review_count = ""
-                review_selectors = [
-                    "#acrCustomerReviewText",
-                    ".a-size-base",
-                    "a[href*='customerReviews']",
-                    "#acrCustomerReviewLink",
-                    "[data-cy='reviews-ratings-count']",
-                    ".a-link-emphasis"
-                ]
-                for selector in review_selectors:
-                    review_el = soup.select_one(selector)
-                    if review_el:
-                        review_text = review_el.get_text(strip=True)
-                        # Look for patterns like "1,234 ratings" or "1,234 customer reviews"
-                        import re
-                        match = re.search(r"([\d,]+)", review_text)
-                        if match:
-                            review_count = match.group(1)
-                            break
-
-                result = {
-                    "url": product_url,
-                    "title": title,
-                    "price": price,
-                    "rating": rating,
-                    "review_count": review_count,
-                    "success": True
-                }
-
-                logger.info(f"✅ Extracted details: {title[:50]}... | Price: {price} | Rating: {rating} | Reviews: {review_count}")
-                return result
-
-            except Exception as e:
-                logger.error(f"❌ Error getting product details: {str(e)}")
-                return {
-                    "url": product_url,
-                    "error": f"Failed to extract product details: {str(e)}",
-                    "success": False
-                }
-            finally:
-                await browser.close()
-                await playwright.stop()
-
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(run())
+        return run_async(extract_product_details(product_url))
 
     # ---------------- Route: Search for top 3 product links ----------------
     @app.route("/search")
@@ -1397,191 +2301,128 @@ def create_app() -> Flask:
         if not keyword:
             return jsonify({"error": "Missing search keyword"}), 400
 
+        # Shared with /search-detailed, which reads the same top 3
+        cache_key = ("products", keyword.lower(), 3)
+        cached = cache_get(SEARCH_CACHE, cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Serving cached search results for: {keyword}")
+            return {"keyword": keyword, "products": cached}
+
         async def run():
-            browser, playwright, page = await get_browser(headless=True)
+            context, page = await new_context()
             try:
-                # Search Amazon
-                search_url = f"https://www.amazon.com/s?k={keyword.replace(' ', '+')}"
-                logger.info(f"🔍 Searching for: {keyword}")
-                await page.goto(search_url, timeout=60000)
-                await page.wait_for_load_state("domcontentloaded")
-                await human_delay(2000, 4000)
-
-                # Add scrolling to load more search results
-                await human_scroll(page, max_scrolls=1)
-
-                try:
-                    await page.wait_for_selector('[data-component-type="s-search-result"]', timeout=15000)
-                except:
-                    html = await page.content()
-                    logger.error("❌ No search results loaded")
+                products = await fetch_basic_products(page, keyword, 3)  # Only top 3
+                if products is None:
                     return {"error": "No search results loaded"}
 
-                soup = BeautifulSoup(await page.content(), "html.parser")
-                product_containers = (
-                    soup.select('[data-component-type="s-search-result"]')
-                    or soup.select('[data-asin][data-index]')
-                    or soup.select('.s-result-item')
-                )
-
-                logger.info(f"🔍 Found {len(product_containers)} product containers")
-
-                products = []
-                for i, container in enumerate(product_containers[:3]):  # Only top 3
-                    logger.info(f"Processing container {i+1}: {str(container)[:200]}...")
-
-                    # Try multiple selectors for title and link
-                    title_el = (
-                        container.select_one('h2 a span') or
-                        container.select_one('h2 span') or
-                        container.select_one('.a-text-normal') or
-                        container.select_one('span.a-text-normal')
-                    )
-
-                    link_el = (
-                        container.select_one('h2 a') or
-                        container.select_one('a.a-link-normal') or
-                        container.select_one('a[href*="/dp/"]')
-                    )
-
-                    if not (title_el and link_el):
-                        logger.warning(f"⚠️ Container {i+1}: Missing title or link")
-                        continue
-
-                    product_url = link_el.get("href", "")
-                    if product_url.startswith("/"):
-                        product_url = f"https://www.amazon.com{product_url}"
-
-                    title_text = title_el.get_text(strip=True)
-                    products.append({
-                        "title": title_text,
-                        "url": product_url
-                    })
-                    logger.info(f"✅ Found product {i+1}: {title_text[:50]}...")
-
                 return {"keyword": keyword, "products": products}
 
             finally:
-                await browser.close()
-                await playwright.stop()
+                await context.close()
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(run())
+        result = run_async(run())
+        if result.get("products"):
+            cache_set(SEARCH_CACHE, cache_key, result["products"])
+        return result
 
     # ---------------- Route: Search with detailed product information ----------------
     @app.route("/search-detailed")
     def search_detailed():
+        """Stream the top 3 products as NDJSON, each line sent as soon as its details are ready"""
         keyword = (request.args.get("q") or "").strip()
         if not keyword:
             return jsonify({"error": "Missing search keyword"}), 400
 
-        async def run():
-            browser, playwright, page = await get_browser(headless=True)
+        cache_key = ("products", keyword.lower(), 3)
+        lines = queue.Queue()
+        done = object()
+
+        async def fetch_details(product, context):
             try:
-                # Search Amazon
-                search_url = f"https://www.amazon.com/s?k={keyword.replace(' ', '+')}"
-                logger.info(f"🔍 Detailed search for: {keyword}")
-                await page.goto(search_url, timeout=60000)
-                await page.wait_for_load_state("domcontentloaded")
-                await human_delay(2000, 4000)
+                return await bounded(extract_product_details(product["url"], context=context))
+            except Exception as e:
+                logger.error(f"❌ Error fetching details for {product['url']}: {str(e)}")
+                # Return basic info if detailed fetch failed
+                return {
+                    **product,
+                    "price": "",
+                    "rating": "",
+                    "review_count": "",
+                    "success": False,
+                    "error": str(e)
+                }
 
-                # Add scrolling to load more search results
-                await human_scroll(page, max_scrolls=1)
+        async def run():
+            context = None
+            tasks = []
+            try:
+                basic_products = cache_get(SEARCH_CACHE, cache_key)
+                if basic_products is not None:
+                    # Known results: details come from their own cache or fetch path
+                    logger.info(f"⚡ Serving cached search results for: {keyword}")
+                else:
+                    context, page = await new_context()
 
-                try:
-                    await page.wait_for_selector('[data-component-type="s-search-result"]', timeout=15000)
-                except:
-                    html = await page.content()
-                    logger.error("❌ No search results loaded")
-                    return {"error": "No search results loaded"}
+                    # Extract basic product info (titles and URLs)
+                    basic_products = await fetch_basic_products(page, keyword, 3)  # Only top 3
+                    if basic_products is None:
+                        lines.put({"error": "No search results loaded"})
+                        return
+                    if basic_products:
+                        cache_set(SEARCH_CACHE, cache_key, basic_products)
 
-                soup = BeautifulSoup(await page.content(), "html.parser")
-                product_containers = (
-                    soup.select('[data-component-type="s-search-result"]')
-                    or soup.select('[data-asin][data-index]')
-                    or soup.select('.s-result-item')
-                )
+                    # Products the HTTP fast path misses render in pages of the search context
+                    await page.close()
 
-                logger.info(f"🔍 Found {len(product_containers)} product containers")
+                lines.put({"keyword": keyword, "total_products": len(basic_products)})
 
-                # Extract basic product info (titles and URLs)
-                basic_products = []
-                for i, container in enumerate(product_containers[:3]):  # Only top 3
-                    logger.info(f"Processing container {i+1}: {str(container)[:200]}...")
-
-                    # Try multiple selectors for title and link
-                    title_el = (
-                        container.select_one('h2 a span') or
-                        container.select_one('h2 span') or
-                        container.select_one('.a-text-normal') or
-                        container.select_one('span.a-text-normal')
-                    )
-
-                    link_el = (
-                        container.select_one('h2 a') or
-                        container.select_one('a.a-link-normal') or
-                        container.select_one('a[href*="/dp/"]')
-                    )
-
-                    if not (title_el and link_el):
-                        logger.warning(f"⚠️ Container {i+1}: Missing title or link")
-                        continue
-
-                    product_url = link_el.get("href", "")
-                    if product_url.startswith("/"):
-                        product_url = f"https://www.amazon.com{product_url}"
-
-                    title_text = title_el.get_text(strip=True)
-                    basic_products.append({
-                        "title": title_text,
-                        "url": product_url
-                    })
-                    logger.info(f"✅ Found product {i+1}: {title_text[:50]}...")
-
-                # Close search browser
-                await browser.close()
-                await playwright.stop()
-
-                # Concurrently fetch detailed information for all products
+                # Concurrently fetch details and emit each product as soon as it finishes
                 logger.info(f"🔄 Fetching detailed info for {len(basic_products)} products concurrently...")
-                tasks = [extract_product_details(product["url"]) for product in basic_products]
-                detailed_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Process results and handle any exceptions
-                products = []
-                for i, result in enumerate(detailed_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"❌ Error fetching details for product {i+1}: {str(result)}")
-                        # Return basic info if detailed fetch failed
-                        products.append({
-                            **basic_products[i],
-                            "price": "",
-                            "rating": "",
-                            "review_count": "",
-                            "success": False,
-                            "error": str(result)
-                        })
-                    else:
-                        products.append(result)
+                tasks = [asyncio.ensure_future(fetch_details(product, context)) for product in basic_products]
+                for next_result in asyncio.as_completed(tasks):
+                    lines.put(await next_result)
 
-                logger.info(f"✅ Completed detailed search for '{keyword}' - {len(products)} products with full details")
-                return {"keyword": keyword, "products": products}
+                logger.info(f"✅ Completed detailed search for '{keyword}' - {len(basic_products)} products with full details")
 
             except Exception as e:
                 logger.error(f"❌ Error in detailed search: {str(e)}")
-                return {"error": f"Search failed: {str(e)}"}
+                lines.put({"error": f"Search failed: {str(e)}"})
             finally:
-                # Make sure browser is closed even if there's an error
+                # If run() was cancelled (timeout, client gone), stop the detail scrapes too:
+                # they would hold scrape slots and keep using the context closed below
+                for task in tasks:
+                    task.cancel()
+                if tasks:
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                # Make sure the context is closed even if there's an error
                 try:
-                    await browser.close()
-                    await playwright.stop()
+                    if context:
+                        await context.close()
                 except:
                     pass
+                lines.put(done)
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(run())
+        def generate():
+            # Same REQUEST_TIMEOUT budget as run_async, spent across the whole stream
+            future = asyncio.run_coroutine_threadsafe(run(), background_loop)
+            deadline = time.monotonic() + REQUEST_TIMEOUT
+            try:
+                while True:
+                    try:
+                        line = lines.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        logger.error(f"⏱️ Request timed out after {REQUEST_TIMEOUT}s")
+                        yield orjson.dumps({"error": "Search timed out"}) + b"\n"
+                        break
+                    if line is done:
+                        break
+                    yield orjson.dumps(line) + b"\n"
+            finally:
+                # Timed out or the client went away: cancel run(), which cancels its detail scrapes
+                # and closes the context
+                future.cancel()
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
     # ---------------- Route: Get product reviews ----------------
     @app.route("/product-reviews")
@@ -1617,28 +2458,24 @@ def create_app() -> Flask:
             result = await extract_product_reviews(product_url, max_reviews, max_pages)
             return result
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(run())
+        return run_async(run())
 
     # ---------------- Route: Download CSV file for reviews ----------------
     @app.route("/download-csv/<filename>")
     def download_csv(filename):
         """Download CSV file with review data"""
         try:
-            # Find the CSV file in exports directory
-            exports_dir = os.path.join(os.path.dirname(__file__), '..', 'exports')
-            filepath = os.path.join(exports_dir, filename)
-
-            if not os.path.exists(filepath):
-                return jsonify({"error": "File not found", "success": False}), 404
-
-            return send_file(
-                filepath,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='text/csv'
-            )
+            # Recent exports are streamed straight from the cached results
+            export = cache_get(EXPORTS_CACHE, filename.removesuffix(".csv"))
+            if export:
+                response = Response(csv_chunks(*export), mimetype='text/csv')
+                response.headers.set("Content-Disposition", "attachment", **attachment_filename_options(filename))
+                return response
+
+            # send_from_directory confines the name to EXPORTS_DIR and answers Range/If-Modified-Since
+            return send_from_directory(EXPORTS_DIR, filename, as_attachment=True, mimetype='text/csv')
+        except NotFound:
+            return jsonify({"error": "File not found", "success": False}), 404
         except Exception as e:
             logger.error(f"❌ Error downloading CSV file: {str(e)}")
             return jsonify({"error": "Download failed", "success": False}), 500
@@ -1648,19 +2485,22 @@ def create_app() -> Flask:
     def download_excel(filename):
         """Download Excel file with review data"""
         try:
-            # Find the Excel file in exports directory
-            exports_dir = os.path.join(os.path.dirname(__file__), '..', 'exports')
-            filepath = os.path.join(exports_dir, filename)
-
-            if not os.path.exists(filepath):
-                return jsonify({"error": "File not found", "success": False}), 404
-
-            return send_file(
-                filepath,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
+            # Recent exports are rendered to a temp file once, then served from disk like the rest
+            export = cache_get(EXPORTS_CACHE, filename.removesuffix(".xlsx"))
+            if export:
+                return send_file(
+                    cached_excel_file(filename, export),
+                    as_attachment=True,
+                    download_name=filename,
+                    mimetype=XLSX_MIMETYPE,
+                    conditional=True,
+                    max_age=0
+                )
+
+            # Otherwise serve the copy in the exports directory
+            return send_from_directory(EXPORTS_DIR, filename, as_attachment=True, mimetype=XLSX_MIMETYPE)
+        except NotFound:
+            return jsonify({"error": "File not found", "success": False}), 404
         except Exception as e:
             logger.error(f"❌ Error downloading Excel file: {str(e)}")
             return jsonify({"error": "Download failed", "success": False}), 500
@@ -1694,72 +2534,29 @@ def create_app() -> Flask:
         if not keyword:
             return jsonify({"error": "Missing search keyword", "success": False}), 400
 
-        async def run():
-            browser, playwright, page = await get_browser(headless=True)
-            try:
-                # Search Amazon
-                search_url = f"https://www.amazon.com/s?k={keyword.replace(' ', '+')}"
-                logger.info(f"🔍 Searching for: {keyword}")
-                await page.goto(search_url, timeout=60000)
-                await page.wait_for_load_state("domcontentloaded")
-                await human_delay(2000, 4000)
+        cache_key = ("search-reviews", keyword.lower(), max_products, min_rating_float)
+        cached = cache_get(SEARCH_CACHE, cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Serving cached search-reviews results for: {keyword}")
+            body, export = cached
+            if export:
+                # The cached body links to this export; keep it downloadable however long the body lives
+                cache_set(EXPORTS_CACHE, *export)
+            return Response(body, mimetype="application/json")
 
-                # Add scrolling to load more search results
-                await human_scroll(page, max_scrolls=1)
+        export = None  # (basename, export entry) registered by run()
 
-                try:
-                    await page.wait_for_selector('[data-component-type="s-search-result"]', timeout=15000)
-                except:
-                    html = await page.content()
-                    logger.error("❌ No search results loaded")
+        async def run():
+            nonlocal export
+            context, page = await new_context()
+            try:
+                # Extract basic product info (titles and URLs)
+                basic_products = await fetch_basic_products(page, keyword, max_products)
+                if basic_products is None:
                     return {"error": "No search results loaded", "search_term": keyword, "success": False}
 
-                soup = BeautifulSoup(await page.content(), "html.parser")
-                product_containers = (
-                    soup.select('[data-component-type="s-search-result"]')
-                    or soup.select('[data-asin][data-index]')
-                    or soup.select('.s-result-item')
-                )
-
-                logger.info(f"🔍 Found {len(product_containers)} product containers")
-
-                # Extract basic product info (titles and URLs)
-                basic_products = []
-                for i, container in enumerate(product_containers[:max_products]):
-                    logger.info(f"Processing container {i+1}: {str(container)[:200]}...")
-
-                    # Try multiple selectors for title and link
-                    title_el = (
-                        container.select_one('h2 a span') or
-                        container.select_one('h2 span') or
-                        container.select_one('.a-text-normal') or
-                        container.select_one('span.a-text-normal')
-                    )
-
-                    link_el = (
-                        container.select_one('h2 a') or
-                        container.select_one('a.a-link-normal') or
-                        container.select_one('a[href*="/dp/"]')
-                    )
-
-                    if not (title_el and link_el):
-                        logger.warning(f"⚠️ Container {i+1}: Missing title or link")
-                        continue
-
-                    product_url = link_el.get("href", "")
-                    if product_url.startswith("/"):
-                        product_url = f"https://www.amazon.com{product_url}"
-
-                    title_text = title_el.get_text(strip=True)
-                    basic_products.append({
-                        "title": title_text,
-                        "url": product_url
-                    })
-                    logger.info(f"✅ Found product {i+1}: {title_text[:50]}...")
-
-                # Close search browser
-                await browser.close()
-                await playwright.stop()
+                # Keep the search context (cookies, routes) for the review pages; drop only the SERP tab
+                await page.close()
 
                 if not basic_products:
                     return {
@@ -1773,7 +2570,10 @@ def create_app() -> Flask:
 
                 # First, get detailed product information to check ratings
                 logger.info(f"🔄 Fetching detailed product information for {len(basic_products)} products...")
-                detail_tasks = [extract_product_details(product["url"]) for product in basic_products]
+                detail_tasks = [
+                    bounded(extract_product_details(product["url"], context=context))
+                    for product in basic_products
+                ]
                 detail_results = await asyncio.gather(*detail_tasks, return_exceptions=True)
                 
                 # Filter products by rating if min_rating is specified
@@ -1824,7 +2624,10 @@ def create_app() -> Flask:
 
                 # Concurrently fetch reviews for filtered products
                 logger.info(f"🔄 Fetching reviews for {len(filtered_products)} filtered products concurrently...")
-                tasks = [extract_product_reviews(product["url"], float('inf'), 3) for product in filtered_products]
+                tasks = [
+                    bounded(extract_product_reviews(product["url"], math.inf, 3, context=context))
+                    for product in filtered_products
+                ]
                 review_results = await asyncio.gather(*tasks, return_exceptions=True)
 
                 # Process results and build optimized response
@@ -1857,14 +2660,25 @@ def create_app() -> Flask:
                 filter_info = f" with rating filter {min_rating_float}+" if min_rating_float is not None else ""
                 logger.info(f"✅ Completed search-reviews for '{keyword}'{filter_info} - {len(products)} products with {total_reviews} total reviews")
 
-                # Generate Excel file
+                # Register the exports; the files are built when they are downloaded
                 try:
-                    excel_filepath, excel_filename = generate_excel_file(keyword, products)
-                    excel_download_url = f"http://localhost:5000/download-excel/{excel_filename}"
-                    logger.info(f"📊 Generated Excel file: {excel_filename}")
+                    # One timestamp for the filenames and the summary row
+                    generated_at = datetime.now()
+                    basename = export_basename(keyword, generated_at)
+                    export = (basename, (keyword, products, generated_at))
+                    cache_set(EXPORTS_CACHE, *export)
+                    if EXPORTS_TO_DISK:
+                        # Writing the files is CPU and disk bound; keep it off the scrape loop
+                        await asyncio.gather(
+                            asyncio.to_thread(generate_excel_file, keyword, products, generated_at, f"{basename}.xlsx"),
+                            asyncio.to_thread(generate_csv_file, keyword, products, generated_at, f"{basename}.csv")
+                        )
+                    excel_download_url = f"http://localhost:5000/download-excel/{basename}.xlsx"
+                    csv_download_url = f"http://localhost:5000/download-csv/{basename}.csv"
+                    logger.info(f"📊 Prepared exports: {basename}")
                 except Exception as e:
                     logger.error(f"❌ Error generating Excel file: {str(e)}")
-                    excel_download_url = None
+                    excel_download_url = csv_download_url = None
 
                 return {
                     "search_term": keyword,
@@ -1872,6 +2686,7 @@ def create_app() -> Flask:
                     "total_reviews": total_reviews,
                     "products": products,
                     "excel_download_url": excel_download_url,
+                    "csv_download_url": csv_download_url,
                     "success": True
                 }
 
@@ -1883,16 +2698,19 @@ def create_app() -> Flask:
                     "success": False
                 }
             finally:
-                # Make sure browser is closed even if there's an error
+                # Make sure the context is closed even if there's an error
                 try:
-                    await browser.close()
-                    await playwright.stop()
+                    await context.close()
                 except:
                     pass
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(run())
+        result = run_async(run())
+        # This is the largest payload the service produces; encode it once and cache the bytes
+        # together with the export its download links point at
+        response = app.json.response(result)
+        if result.get("success") and result.get("products"):
+            cache_set(SEARCH_CACHE, cache_key, (response.get_data(), export))
+        return response
 
     # ---------------- Route: Get authentication config ----------------
     @app.route("/auth-config", methods=["GET"])
@@ -1936,7 +2754,10 @@ def create_app() -> Flask:
             if "persistent_session" in data:
                 current_config["persistent_session"] = bool(data["persistent_session"])
 
-            # Save updated config
+            # Save updated config; the next context re-validates against it
+            login_session.forget()
+            if not current_config["enabled"]:
+                clear_storage_state()
             if save_auth_config(current_config):
                 logger.info("✅ Auth config updated successfully")
                 return jsonify({
@@ -1955,8 +2776,7 @@ def create_app() -> Flask:
     def test_auth():
         """Test Amazon authentication with current credentials"""
         async def run():
-            browser = None
-            playwright = None
+            context = None
             try:
                 auth_config = load_auth_config()
                 if not auth_config['enabled']:
@@ -1965,11 +2785,10 @@ def create_app() -> Flask:
                 if not auth_config['credentials']['email'] or not auth_config['credentials']['password']:
                     return {"error": "Email and password must be configured", "success": False}
 
-                browser, playwright, page = await get_browser(headless=True, auto_login=True)
+                context, page = await new_context(auto_login=True)
                 
                 # Check if we're logged in by looking for account info
-                await page.goto("https://www.amazon.com", timeout=15000)  # Reduced from 30s to 15s
-                await page.wait_for_load_state("domcontentloaded")
+                await page.goto(AMAZON_BASE, timeout=15000)  # Reduced from 30s to 15s
                 await human_delay(1000, 1500)  # Reduced from 2-3s to 1-1.5s
 
                 try:
@@ -1991,22 +2810,17 @@ def create_app() -> Flask:
                 logger.error(f"❌ Error testing auth: {str(e)}")
                 return {"error": f"Test failed: {str(e)}", "success": False}
             finally:
-                if browser:
-                    await browser.close()
-                if playwright:
-                    await playwright.stop()
+                if context:
+                    await context.close()
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return jsonify(loop.run_until_complete(run()))
+        return jsonify(run_async(run()))
 
     # ---------------- Route: Authentication status ----------------
     @app.route("/auth-status", methods=["GET"])
     def auth_status():
         """Return current authentication status without attempting login"""
         async def run():
-            browser = None
-            playwright = None
+            context = None
             try:
                 config = load_auth_config()
                 enabled = bool(config.get('enabled'))
@@ -2021,12 +2835,11 @@ def create_app() -> Flask:
                         "success": True
                     }
 
-                # Start browser, restore cookies if present, but do NOT attempt login
-                browser, playwright, page = await get_browser(headless=True, auto_login=False)
+                # Open a context, restore cookies if present, but do NOT attempt login
+                context, page = await new_context(auto_login=False)
 
                 # Quick validation by checking account element
-                await page.goto("https://www.amazon.com", timeout=15000)
-                await page.wait_for_load_state("domcontentloaded")
+                await page.goto(AMAZON_BASE, timeout=15000)
                 await human_delay(300, 600)
 
                 is_logged_in = False
@@ -2060,16 +2873,12 @@ def create_app() -> Flask:
                 }
             finally:
                 try:
-                    if browser:
-                        await browser.close()
-                    if playwright:
-                        await playwright.stop()
+                    if context:
+                        await context.close()
                 except Exception:
                     pass
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return jsonify(loop.run_until_complete(run()))
+        return jsonify(run_async(run()))
 
     # ---------------- Route: Clear authentication data ----------------
     @app.route("/clear-auth", methods=["POST"])
@@ -2079,6 +2888,8 @@ def create_app() -> Flask:
             # Reset config to defaults
             default_config = AUTO_AUTH_CONFIG.copy()
             save_auth_config(default_config)
+            login_session.forget()
+            clear_storage_state()
             
             # Remove session file if it exists
             session_file = os.path.join(os.path.dirname(__file__), default_config['session_file'])
@@ -2097,11 +2908,13 @@ def create_app() -> Flask:
     # Serve frontend files
     @app.route('/')
     def serve_frontend():
-        return send_file('../index.html')
+        # Always revalidate the page itself so asset changes are picked up
+        return send_from_directory(FRONTEND_DIR, 'index.html', max_age=0)
 
     @app.route('/<path:filename>')
     def serve_static(filename):
-        return send_file(f'../{filename}')
+        # send_from_directory rejects paths that escape FRONTEND_DIR
+        return send_from_directory(FRONTEND_DIR, filename, max_age=STATIC_MAX_AGE)
 
     return app
 
@@ -123,6 +123,7 @@ function displayResults(data) {
         <h2>Search Results for "${data.search_term}"${ratingText}</h2>
         <p>Found ${data.total_products} products with ${data.total_reviews} total reviews</p>
         ${data.excel_download_url ? `<p><a href="${data.excel_download_url}" target="_blank" class="download-all-btn">📊 Download All Reviews (Excel)</a></p>` : ''}
+        ${data.csv_download_url ? `<p><a href="${data.csv_download_url}" target="_blank" class="download-all-btn">📄 Download All Reviews (CSV)</a></p>` : ''}
     `;
 
     // Clear previous results
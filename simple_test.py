@@ -38,7 +38,7 @@ async def test_simple_review_extraction():
         
         # Get page content
         content = await page.content()
-        soup = BeautifulSoup(content, "html.parser")
+        soup = BeautifulSoup(content, "lxml")
         
         # Look for review elements
         review_containers = soup.select('li[data-hook="review"]')